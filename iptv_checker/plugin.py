@@ -4,14 +4,29 @@ Checks stream status and analyzes stream quality
 """
 
 import logging
+import sys
 import requests
 import subprocess
 import json
 import os
 import re
+import signal
 import csv
+import gzip
 import time
+import http.client
+from urllib.parse import urlsplit, urljoin
 import threading
+import shutil
+import math
+import fcntl
+import socket
+import uuid
+import bisect
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from contextlib import contextmanager
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Setup logging using Dispatcharr's format
@@ -23,6 +38,811 @@ if not LOGGER.handlers:
     LOGGER.addHandler(handler)
 LOGGER.setLevel(logging.INFO)
 
+FFPROBE_PATH = '/usr/local/bin/ffprobe'
+FFMPEG_PATH = '/usr/local/bin/ffmpeg'
+USER_AGENT = 'IPTVChecker 1.0'
+
+# Fields usable in the Slow Stream Criteria setting, mapped to (result key, scale to display units)
+SLOW_CRITERIA_FIELDS = {
+    "startup": ("first_frame_ms", 0.001),
+    "probe": ("probe_ms", 0.001),
+    "connect": ("connect_ms", 0.001),
+    "ttfb": ("ttfb_ms", 0.001),
+    "bitrate": ("bitrate_kbps", 1),
+    "throughput": ("throughput_kbps", 1),
+    "throughput_ratio": ("throughput_ratio", 1),
+    "bitrate_ratio": ("bitrate_ratio", 1),
+    "fps": ("framerate_num", 1),
+}
+SLOW_CRITERION_PATTERN = re.compile(r'^\s*(\w+)\s*(<=|>=|<|>)\s*(\d+(?:\.\d+)?)\s*$')
+
+# Resolution ranking used when ordering a channel's streams; higher is better
+FORMAT_RANK = {"4K": 4, "FHD": 3, "HD": 2, "SD": 1}
+
+# ffprobe failure classification table: (pattern, error_type, error message, transient).
+# The first matching row wins, so more specific diagnostics come first. HTTP status rows are
+# anchored to ffprobe's "Server returned"/"HTTP error" wording so numbers inside URLs don't match.
+_HTTP_STATUS = r'(?:server returned|http error)\s+'
+FAILURE_PATTERNS = [
+    (re.compile(r'protocol not found|protocol not supported', re.I), 'Unsupported Protocol', 'Unsupported protocol', False),
+    (re.compile(_HTTP_STATUS + r'(?:404|410)', re.I), '404 Not Found', '404 Not Found', False),
+    (re.compile(_HTTP_STATUS + r'403', re.I), '403 Forbidden', '403 Forbidden', False),
+    (re.compile(_HTTP_STATUS + r'401', re.I), '401 Unauthorized', '401 Unauthorized', False),
+    (re.compile(_HTTP_STATUS + r'429', re.I), 'Rate Limited', '429 Too Many Requests', True),
+    (re.compile(_HTTP_STATUS + r'5(?:\d\d|xx)', re.I), 'Server Error', '5xx Server Error', True),
+    (re.compile(_HTTP_STATUS + r'4(?:\d\d|xx)', re.I), 'Client Error', '4xx Client Error', False),
+    (re.compile(r'timed out|timeout', re.I), 'Timeout', 'Connection timeout', True),
+    (re.compile(r'temporary failure in name resolution', re.I), 'DNS Resolution Failed', 'Temporary DNS failure', True),
+    (re.compile(r'failed to resolve hostname|name or service not known|no address associated', re.I), 'DNS Resolution Failed', 'Hostname could not be resolved', False),
+    (re.compile(r'connection refused', re.I), 'Connection Refused', 'Connection refused', True),
+    (re.compile(r'network is unreachable|network unreachable|no route to host', re.I), 'Network Unreachable', 'Network unreachable', True),
+    (re.compile(r'connection reset|broken pipe|end of file|i/o error', re.I), 'Connection Reset', 'Connection reset by server', True),
+    # Local/file protocol inputs; HTTP 404s are matched by the anchored status row above
+    (re.compile(r'no such file or directory', re.I), 'File Not Found', 'No such file or directory', False),
+    (re.compile(r'invalid data found|invalid argument', re.I), 'Invalid Stream', 'Invalid stream format', False),
+]
+
+
+def classify_probe_failure(stderr, returncode):
+    """Classify a failed ffprobe run from its error-level diagnostics and return code.
+
+    Returns (error_type, error, transient). Transient failures are worth retrying later.
+    """
+    diagnostics = (stderr or '').strip()
+    for pattern, error_type, error, transient in FAILURE_PATTERNS:
+        if pattern.search(diagnostics):
+            return error_type, error, transient
+    if returncode is not None and returncode < 0:
+        return 'Other', f'ffprobe terminated by signal {-returncode}', True
+    if returncode == 1:
+        # Common ffprobe return code for unreachable streams
+        return 'Stream Unreachable', 'Stream unreachable', False
+    last_line = diagnostics.splitlines()[-1][:200] if diagnostics else 'Stream not accessible'
+    return 'Other', last_line, False
+
+
+@contextmanager
+def file_lock(lock_file, exclusive=True):
+    """Hold an fcntl lock on lock_file, shared by every process on the host."""
+    with open(lock_file, 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def write_file_atomic(path, text, mode=None):
+    """Replace path with text through a per-process temp file, so readers never see a partial write."""
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    if mode is None:
+        handle = open(tmp_file, 'w')
+    else:
+        handle = os.fdopen(os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode), 'w')
+    with handle as f: f.write(text)
+    os.replace(tmp_file, path)
+
+
+# Prometheus metrics: name -> (type, help). Only metrics listed here are exported.
+METRIC_DEFINITIONS = {
+    "iptv_checker_stream_results_total": ("counter", "Stream check results by status, error type and channel group."),
+    "iptv_checker_probe_duration_seconds": ("histogram", "Wall time of each stream probe, including performance profiling."),
+    "iptv_checker_retries_total": ("counter", "Streams queued for a later retry by error type."),
+    "iptv_checker_api_request_duration_seconds": ("histogram", "Latency of Dispatcharr API requests by method and endpoint."),
+    "iptv_checker_api_errors_total": ("counter", "Failed Dispatcharr API requests by method and endpoint."),
+    "iptv_checker_runs_total": ("counter", "Finished check runs by outcome."),
+    "iptv_checker_last_run_streams": ("gauge", "Streams checked in the last run by status, error type and channel group."),
+    "iptv_checker_last_run_duration_seconds": ("gauge", "Duration of the last check run."),
+    "iptv_checker_last_run_throughput_streams_per_second": ("gauge", "Streams checked per second in the last run."),
+    "iptv_checker_last_run_carried_over_streams": ("gauge", "Streams left unchecked by the last run."),
+    "iptv_checker_last_run_timestamp_seconds": ("gauge", "Unix time the last check run finished."),
+}
+# Histogram bucket upper bounds in seconds
+HISTOGRAM_BUCKETS = {
+    "iptv_checker_probe_duration_seconds": (0.5, 1, 2.5, 5, 10, 20, 30, 60),
+    "iptv_checker_api_request_duration_seconds": (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+}
+
+_ROW_ENCODER = json.JSONEncoder(separators=(',', ':'))
+
+
+class StreamJob:
+    """One channel/stream pair to check."""
+
+    __slots__ = ('channel_id', 'channel_name', 'group_name', 'stream_url', 'stream_id')
+
+    def __init__(self, channel_id, channel_name, group_name, stream_url, stream_id):
+        self.channel_id = channel_id
+        self.channel_name = channel_name
+        self.group_name = sys.intern(group_name or '')
+        self.stream_url = stream_url
+        self.stream_id = stream_id
+
+    @property
+    def key(self):
+        """Stable identifier for a channel/stream pair across runs."""
+        return f"{self.channel_id}:{self.stream_id}"
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row.get('channel_id'), row.get('channel_name', ''), row.get('group_name', ''), row.get('stream_url', ''), row.get('stream_id'))
+
+
+class ProbeResult:
+    """Outcome of checking a StreamJob, stored as one flat row in the results file."""
+    # Always written to the results file (checked_at only when known)
+    CORE_FIELDS = ('status', 'error', 'error_type', 'format', 'framerate_num', 'checked_at')
+    # Only written when set
+    OPTIONAL_FIELDS = ('retry_count', 'transient', 'probe_returncode', 'diagnostics', 'probe_ms', 'declared_bitrate_kbps',
+                       'connect_ms', 'ttfb_ms', 'first_frame_ms', 'first_frame_error', 'bitrate_kbps', 'bitrate_ratio', 'throughput_kbps', 'throughput_ratio')
+    # Low-cardinality strings shared between records
+    INTERNED_FIELDS = frozenset(('status', 'error_type', 'format'))
+
+    __slots__ = ('job',) + CORE_FIELDS + OPTIONAL_FIELDS
+
+    def __init__(self, job, status='Dead', error='', error_type='Other', format='N/A', framerate_num=0, checked_at=None, **optional):
+        self.job = job
+        self.status = sys.intern(status)
+        self.error = error
+        self.error_type = sys.intern(error_type)
+        self.format = sys.intern(format)
+        self.framerate_num = framerate_num
+        # None for rows loaded from results written before checks were timestamped
+        self.checked_at = checked_at
+        for name in self.OPTIONAL_FIELDS:
+            setattr(self, name, optional.pop(name, None))
+        if optional:
+            raise TypeError(f"Unknown result fields: {', '.join(optional)}")
+
+    def update(self, **fields):
+        for name, value in fields.items():
+            if name in self.INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, name, value)
+
+    def to_row(self):
+        job = self.job
+        row = {'channel_id': job.channel_id, 'channel_name': job.channel_name, 'group_name': job.group_name,
+               'stream_url': job.stream_url, 'stream_id': job.stream_id,
+               'status': self.status, 'error': self.error, 'error_type': self.error_type, 'format': self.format,
+               'framerate_num': self.framerate_num}
+        if self.checked_at is not None:
+            row['checked_at'] = self.checked_at
+        for name in self.OPTIONAL_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                row[name] = value
+        return row
+
+    @classmethod
+    def probed(cls, job, **fields):
+        """A result produced by checking the stream now."""
+        return cls(job, checked_at=datetime.now().isoformat(timespec='seconds'), **fields)
+
+    def to_json(self):
+        return _ROW_ENCODER.encode(self.to_row())
+
+    @classmethod
+    def from_row(cls, row):
+        fields = {name: row[name] for name in cls.CORE_FIELDS + cls.OPTIONAL_FIELDS if name in row}
+        return cls(StreamJob.from_row(row), **fields)
+
+
+class CheckControl:
+    """Stop/pause signalling and ffprobe child tracking shared by every Plugin instance in the process."""
+
+    def __init__(self):
+        self.stop_event = threading.Event()
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        self._lock = threading.Lock()
+        self._processes = set()
+        self._running = False
+
+    @property
+    def running(self):
+        return self._running
+
+    def try_begin(self):
+        """Mark a check as running. Returns False if one is already running in this process."""
+        with self._lock:
+            if self._running: return False
+            self._running = True
+            return True
+
+    def end(self):
+        with self._lock: self._running = False
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    @property
+    def paused(self):
+        return not self.resume_event.is_set()
+
+    def reset(self):
+        """Clear stop/pause state before a new check starts."""
+        self.stop_event.clear()
+        self.resume_event.set()
+
+    def request_stop(self):
+        """Signal all workers to stop and kill running probes."""
+        self.stop_event.set()
+        self.resume_event.set()  # Wake paused workers so they can exit
+        self.terminate_all()
+
+    def pause(self):
+        """Hold workers before their next probe and kill running probes so they can be redone on resume."""
+        self.resume_event.clear()
+        self.terminate_all()
+
+    def resume(self):
+        self.resume_event.set()
+
+    def wait_if_paused(self):
+        """Block while paused. Returns False if the check was stopped."""
+        while not self.resume_event.wait(1):
+            if self.stopped: break
+        return not self.stopped
+
+    def sleep(self, seconds):
+        """Sleep that returns early (True) when a stop is requested."""
+        return self.stop_event.wait(seconds)
+
+    def register(self, process):
+        with self._lock: self._processes.add(process)
+
+    def unregister(self, process):
+        with self._lock: self._processes.discard(process)
+
+    def terminate_all(self, grace=2):
+        """Terminate the process group of every running probe, escalating to SIGKILL after a grace period."""
+        with self._lock: processes = list(self._processes)
+        for process in processes:
+            self.signal_group(process, signal.SIGTERM)
+        deadline = time.time() + grace
+        for process in processes:
+            try:
+                process.wait(timeout=max(0, deadline - time.time()))
+            except subprocess.TimeoutExpired:
+                self.signal_group(process, signal.SIGKILL)
+        if processes:
+            LOGGER.info(f"Terminated {len(processes)} running probe(s)")
+
+    @staticmethod
+    def signal_group(process, sig):
+        try:
+            os.killpg(process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+CHECK_CONTROL = CheckControl()
+
+
+class SharedRunState:
+    """Check run state shared by every plugin instance and worker process.
+
+    Stored as JSON next to the results and guarded by a file lock, so progress, completion
+    messages and stop/pause requests are visible whichever instance serves the action.
+    """
+
+    # A run whose worker has not written a heartbeat for this long is considered dead
+    STALE_AFTER = 90
+
+    def __init__(self, state_file, lock_file):
+        self.state_file = state_file
+        self.lock_file = lock_file
+
+    def _read_unlocked(self):
+        try:
+            with open(self.state_file, 'r') as f: return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_unlocked(self, state):
+        write_file_atomic(self.state_file, json.dumps(state))
+
+    def read(self):
+        try:
+            with file_lock(self.lock_file, exclusive=False): return self._read_unlocked()
+        except OSError:
+            return {}
+
+    def is_active(self, state):
+        """True if the state describes a running check with a live worker."""
+        return state.get('status') == 'running' and time.time() - state.get('heartbeat', 0) < self.STALE_AFTER
+
+    def update(self, run_id=None, **changes):
+        """Apply changes, optionally only if run_id still owns the state. Returns False if it does not."""
+        with file_lock(self.lock_file):
+            state = self._read_unlocked()
+            if run_id and state.get('run_id') != run_id:
+                return False
+            state.update(changes)
+            self._write_unlocked(state)
+            return True
+
+    def begin(self, total, origin="manual"):
+        """Claim the state for a new run. Returns the run id, or None if another run is active."""
+        with file_lock(self.lock_file):
+            state = self._read_unlocked()
+            if self.is_active(state):
+                return None
+            now = time.time()
+            run_id = uuid.uuid4().hex[:12]
+            self._write_unlocked({
+                "run_id": run_id, "status": "running", "control": "run", "origin": origin,
+                "owner": {"pid": os.getpid(), "host": socket.gethostname()},
+                "start_time": now, "heartbeat": now,
+                "current": 0, "total": total, "alive": 0, "dead": 0, "retry_queue": 0,
+                "completion_message": None,
+            })
+            return run_id
+
+    def finish(self, run_id, message):
+        return self.update(run_id, status="idle", control="run", heartbeat=time.time(), finished_at=time.time(), completion_message=message)
+
+    def take_completion_message(self):
+        """Return the completion message once, whichever instance asks for it."""
+        with file_lock(self.lock_file):
+            state = self._read_unlocked()
+            message = state.get('completion_message')
+            if message:
+                state['completion_message'] = None
+                self._write_unlocked(state)
+            return message
+
+
+class HostReachability:
+    """DNS and TCP reachability of stream hosts, cached with a short TTL.
+
+    Streams usually share a handful of upstream hosts, so one cheap connect per host tells
+    whether its streams can be probed at all. Failures are classified with the ffprobe table.
+    """
+
+    DEFAULT_PORTS = {"http": 80, "https": 443, "rtmp": 1935, "rtsp": 554}
+    # Probe failures that say more about the host than the stream
+    HOST_ERROR_TYPES = frozenset(('DNS Resolution Failed', 'Connection Refused', 'Network Unreachable'))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dns = {}  # host -> (expires, [(family, sockaddr)], failure)
+        self._tcp = {}  # (host, port) -> (expires, failure)
+
+    @classmethod
+    def endpoint(cls, url):
+        """The (host, port) a stream URL connects to, or None if it can't be pre-checked."""
+        try:
+            parts = urlsplit(url or '')
+            port = parts.port
+        except ValueError:
+            return None
+        scheme = parts.scheme.lower()
+        if not parts.hostname or scheme not in cls.DEFAULT_PORTS:
+            return None
+        return parts.hostname.lower(), port or cls.DEFAULT_PORTS[scheme]
+
+    def _resolve(self, host, ttl):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._dns.get(host)
+        if cached and cached[0] > now:
+            return cached[1], cached[2]
+        try:
+            addresses = [(info[0], info[4]) for info in socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)]
+            failure = None if addresses else ('DNS Resolution Failed', 'Hostname could not be resolved', False)
+        except socket.gaierror as e:
+            addresses, failure = [], classify_probe_failure(str(e), None)
+        with self._lock:
+            self._dns[host] = (now + ttl, addresses, failure)
+        return addresses, failure
+
+    def _connect(self, addresses, port, timeout):
+        last_error = None
+        for family, sockaddr in addresses[:3]:
+            try:
+                with socket.socket(family, socket.SOCK_STREAM) as sock:
+                    sock.settimeout(timeout)
+                    sock.connect((sockaddr[0], port) + tuple(sockaddr[2:]))
+                return None
+            except OSError as e:
+                last_error = e
+        return classify_probe_failure(str(last_error) or type(last_error).__name__, None)
+
+    def check(self, endpoint, ttl, connect_timeout):
+        """Return (error_type, error, transient) if the endpoint is unreachable, else None."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._tcp.get(endpoint)
+        if cached and cached[0] > now:
+            return cached[1]
+        host, port = endpoint
+        addresses, failure = self._resolve(host, ttl)
+        if not failure:
+            failure = self._connect(addresses, port, connect_timeout)
+        with self._lock:
+            self._tcp[endpoint] = (time.monotonic() + ttl, failure)
+        return failure
+
+    def invalidate(self, endpoint):
+        """Forget a host's cached state so the next stream on it checks again."""
+        with self._lock:
+            self._tcp.pop(endpoint, None)
+            self._dns.pop(endpoint[0], None)
+
+
+HOST_REACHABILITY = HostReachability()
+
+
+class MetricsRegistry:
+    """Prometheus metrics for check runs and Dispatcharr API calls.
+
+    Samples are buffered in memory and merged into a JSON store under a file lock on flush, so
+    counters keep accumulating whichever worker process recorded them. The store is rendered in
+    the Prometheus text format for the textfile collector and the optional HTTP endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = self._empty()
+
+    @staticmethod
+    def _empty():
+        return {"counters": {}, "histograms": {}, "gauges": {}}
+
+    @staticmethod
+    def _label_string(labels):
+        """Render labels in the exposition format; the string doubles as the sample key."""
+        if not labels: return ""
+        def escape(value): return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return ",".join(f'{name}="{escape(value)}"' for name, value in sorted(labels.items()))
+
+    @property
+    def pending(self):
+        with self._lock:
+            return any(self._pending.values())
+
+    def inc(self, name, labels=None, value=1):
+        key = self._label_string(labels)
+        with self._lock:
+            samples = self._pending["counters"].setdefault(name, {})
+            samples[key] = samples.get(key, 0) + value
+
+    def observe(self, name, value, labels=None):
+        buckets = HISTOGRAM_BUCKETS[name]
+        key = self._label_string(labels)
+        with self._lock:
+            sample = self._pending["histograms"].setdefault(name, {}).setdefault(key, {"buckets": [0] * (len(buckets) + 1), "sum": 0, "count": 0})
+            # Per-bucket counts; they are made cumulative when rendered
+            sample["buckets"][bisect.bisect_left(buckets, value)] += 1
+            sample["sum"] += value
+            sample["count"] += 1
+
+    def set_gauges(self, name, samples):
+        """Replace every sample of a gauge with (labels, value) pairs."""
+        with self._lock:
+            self._pending["gauges"][name] = {self._label_string(labels): value for labels, value in samples}
+
+    @contextmanager
+    def time_api(self, method, endpoint):
+        """Time a Dispatcharr API request; numeric path segments are collapsed to keep label cardinality low."""
+        labels = {"method": method, "endpoint": re.sub(r'/\d+(?=/|$)', '/{id}', endpoint)}
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.inc("iptv_checker_api_errors_total", labels)
+            raise
+        finally:
+            self.observe("iptv_checker_api_request_duration_seconds", time.monotonic() - started, labels)
+
+    def _read_store(self, store_file):
+        try:
+            with open(store_file, 'r') as f: store = json.load(f)
+        except (OSError, ValueError):
+            store = {}
+        return {**self._empty(), **store}
+
+    def flush(self, store_file, lock_file, textfile=None):
+        """Merge buffered samples into the shared store and rewrite the textfile."""
+        with self._lock:
+            pending, self._pending = self._pending, self._empty()
+        with file_lock(lock_file):
+            store = self._read_store(store_file)
+            for name, samples in pending["counters"].items():
+                stored = store["counters"].setdefault(name, {})
+                for key, value in samples.items():
+                    stored[key] = stored.get(key, 0) + value
+            for name, samples in pending["histograms"].items():
+                stored = store["histograms"].setdefault(name, {})
+                for key, sample in samples.items():
+                    previous = stored.get(key)
+                    # Start over if the bucket layout changed between versions
+                    if not previous or len(previous["buckets"]) != len(sample["buckets"]):
+                        stored[key] = sample
+                        continue
+                    previous["buckets"] = [a + b for a, b in zip(previous["buckets"], sample["buckets"])]
+                    previous["sum"] += sample["sum"]
+                    previous["count"] += sample["count"]
+            store["gauges"].update(pending["gauges"])
+            write_file_atomic(store_file, json.dumps(store))
+            if textfile:
+                write_file_atomic(textfile, self.render(store))
+
+    def render_store(self, store_file, lock_file):
+        with file_lock(lock_file, exclusive=False):
+            return self.render(self._read_store(store_file))
+
+    def render(self, store):
+        """Render a metrics store in the Prometheus text exposition format."""
+        lines = []
+        for name, (kind, help_text) in METRIC_DEFINITIONS.items():
+            samples = store[kind + "s"].get(name)
+            if not samples: continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for key, value in sorted(samples.items()):
+                labels = f"{{{key}}}" if key else ""
+                if kind != "histogram":
+                    lines.append(f"{name}{labels} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(HISTOGRAM_BUCKETS[name] + ("+Inf",), value["buckets"]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{key + "," if key else ""}le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum{labels} {round(value['sum'], 6)}")
+                lines.append(f"{name}_count{labels} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        try:
+            body = self.server.render_fn().encode('utf-8')
+        except Exception as e:
+            self.send_error(500, str(e))
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        LOGGER.debug("Metrics endpoint: " + format % args)
+
+
+class MetricsServer:
+    """Optional HTTP endpoint serving the shared metrics store for Prometheus to scrape."""
+
+    def __init__(self):
+        self.server = None
+        self.port = None
+        self._lock = threading.Lock()
+
+    def ensure(self, port, render_fn, logger):
+        """Serve on port, restarting on a port change; port 0 turns the endpoint off."""
+        with self._lock:
+            if port == self.port: return
+            if self.server:
+                self.server.shutdown()
+                self.server.server_close()
+                self.server = None
+                logger.info(f"Metrics endpoint on port {self.port} stopped")
+            self.port = port
+            if not port: return
+            try:
+                server = ThreadingHTTPServer(('0.0.0.0', port), _MetricsRequestHandler)
+            except OSError as e:
+                # With several worker processes only one can bind; the others share its store
+                logger.warning(f"Metrics endpoint could not listen on port {port}: {e}")
+                return
+            server.daemon_threads = True
+            server.render_fn = render_fn
+            thread = threading.Thread(target=server.serve_forever, name="iptv-checker-metrics")
+            thread.daemon = True
+            thread.start()
+            self.server = server
+            logger.info(f"Metrics endpoint listening on port {port}")
+
+
+METRICS_SERVER = MetricsServer()
+
+
+class PeriodicScheduler:
+    """Runs rolling check slices on the persisted schedule.
+
+    One scheduler thread per process; an exclusive file lock ensures only one process runs slices.
+    """
+
+    def __init__(self):
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.slice_running = False
+        self._lock_handle = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, plugin):
+        if self.running:
+            if not self.stop_event.is_set(): return False
+            self.thread.join(timeout=10)  # Let a stopping scheduler exit before restarting
+            if self.running: return False
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._loop, args=(plugin,), name="iptv-checker-scheduler")
+        self.thread.daemon = True
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """Stop scheduling new slices and stop a slice that is in progress."""
+        self.stop_event.set()
+        if self.slice_running:
+            CHECK_CONTROL.request_stop()
+
+    def _acquire_process_lock(self, path):
+        if self._lock_handle: return True
+        handle = open(path, 'a')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._lock_handle = handle
+        return True
+
+    def _release_process_lock(self):
+        if self._lock_handle:
+            fcntl.flock(self._lock_handle, fcntl.LOCK_UN)
+            self._lock_handle.close()
+            self._lock_handle = None
+
+    def _loop(self, plugin):
+        LOGGER.info("Scheduler started")
+        try:
+            while not self.stop_event.is_set():
+                # Checked before the lock too, so processes that don't own the schedule stop polling once it is disabled
+                schedule = plugin._load_schedule()
+                if not schedule.get('enabled'):
+                    break
+                if not self._acquire_process_lock(plugin.scheduler_lock_file):
+                    # Another process owns the schedule; take over if it goes away
+                    self.stop_event.wait(60)
+                    continue
+                wait = schedule.get('next_run', 0) - time.time()
+                if wait > 0:
+                    self.stop_event.wait(min(wait, 60))
+                    continue
+                self.slice_running = True
+                try:
+                    plugin._run_scheduled_slice(schedule, LOGGER)
+                except Exception as e:
+                    LOGGER.error(f"Scheduled check failed: {e}")
+                finally:
+                    self.slice_running = False
+        finally:
+            self._release_process_lock()
+            LOGGER.info("Scheduler stopped")
+
+
+SCHEDULER = PeriodicScheduler()
+
+
+class ProbeGovernor:
+    """Limits concurrent ffprobe children based on system load, free memory and active Dispatcharr clients."""
+
+    def __init__(self, settings, logger, client_count_fn=None):
+        self.logger = logger
+        self.max_concurrent = max(1, int(settings.get("max_concurrent_probes", 1) or 1))
+        self.max_load = float(settings.get("governor_max_load", 0) or 0)
+        self.min_free_mb = float(settings.get("governor_min_free_mb", 0) or 0)
+        self.max_active_clients = int(settings.get("governor_max_active_clients", 0) or 0)
+        self.low_priority = bool(settings.get("probe_low_priority", True))
+        self.memory_limit_mb = int(settings.get("probe_memory_limit_mb", 0) or 0)
+        self.client_count_fn = client_count_fn if self.max_active_clients > 0 else None
+        self._cond = threading.Condition()
+        self._active = 0
+        self._limit = self.max_concurrent
+        self._evaluated_at = 0
+        self._clients = None
+        self._clients_checked_at = 0
+        self._prefix = self._build_command_prefix()
+
+    def _build_command_prefix(self):
+        """Wrap probes with ionice/nice/prlimit where those tools are available."""
+        prefix = []
+        if self.low_priority:
+            # -t: still run the probe if the I/O priority can't be set (e.g. denied by a container profile)
+            if shutil.which('ionice'): prefix += ['ionice', '-c', '2', '-n', '7', '-t']
+            if shutil.which('nice'): prefix += ['nice', '-n', '10']
+        if self.memory_limit_mb > 0:
+            if shutil.which('prlimit'):
+                prefix += ['prlimit', f'--as={self.memory_limit_mb * 1024 * 1024}', '--']
+            else:
+                self.logger.warning("prlimit not found; probe memory limit will not be applied")
+        return prefix
+
+    def wrap_command(self, cmd):
+        return self._prefix + cmd
+
+    @property
+    def active(self):
+        with self._cond: return self._active
+
+    def _free_memory_mb(self):
+        try:
+            with open('/proc/meminfo', 'r') as f:
+                for line in f:
+                    if line.startswith('MemAvailable:'):
+                        return int(line.split()[1]) / 1024
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+
+    def _active_clients(self):
+        if not self.client_count_fn: return None
+        if time.time() - self._clients_checked_at >= 30:
+            self._clients = self.client_count_fn()
+            self._clients_checked_at = time.time()
+        return self._clients
+
+    def current_limit(self):
+        """Number of probes allowed to run right now, re-evaluated every few seconds."""
+        if time.time() - self._evaluated_at < 5:
+            return self._limit
+
+        limit, reasons = self.max_concurrent, []
+        if self.max_load > 0:
+            try:
+                load_per_cpu = os.getloadavg()[0] / (os.cpu_count() or 1)
+            except OSError:
+                load_per_cpu = 0
+            if load_per_cpu > self.max_load:
+                limit = max(1, int(limit * self.max_load / load_per_cpu))
+                reasons.append(f"load {load_per_cpu:.2f}/cpu")
+        if self.min_free_mb > 0:
+            free_mb = self._free_memory_mb()
+            if free_mb is not None and free_mb < self.min_free_mb:
+                limit = 1
+                reasons.append(f"free memory {free_mb:.0f} MB")
+        clients = self._active_clients()
+        if clients is not None and clients > self.max_active_clients:
+            limit = 0
+            reasons.append(f"{clients} active clients")
+
+        if limit != self._limit:
+            detail = f" ({', '.join(reasons)})" if reasons else ""
+            self.logger.info(f"Probe concurrency adjusted from {self._limit} to {limit}{detail}")
+        self._limit, self._evaluated_at = limit, time.time()
+        return limit
+
+    def acquire(self, deadline=None):
+        """Wait for a probe slot. Returns False if the check was stopped or the deadline passed."""
+        while not CHECK_CONTROL.stopped:
+            if deadline and time.time() >= deadline:
+                return False
+            limit = self.current_limit()
+            with self._cond:
+                if self._active < limit:
+                    self._active += 1
+                    return True
+                self._cond.wait(timeout=1)
+        return False
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
 class Plugin:
     """Dispatcharr IPTV Checker Plugin"""
     
@@ -73,7 +893,156 @@ class Plugin:
             "label": "Dead Connection Retries",
             "type": "number",
             "default": 3,
-            "help_text": "Number of times to retry checking a stream if it appears to be dead. Default: 3",
+            "help_text": "Number of times to retry a stream whose check failed with a transient error (timeout, 5xx, 429, connection reset). Default: 3",
+        },
+        {
+            "id": "host_precheck",
+            "label": "Pre-check Stream Hosts",
+            "type": "boolean",
+            "default": True,
+            "help_text": "Before probing, resolve and connect to each stream host once. Streams on hosts that don't resolve or accept connections are marked dead without running ffprobe. Disable if streams are reached through a proxy.",
+        },
+        {
+            "id": "host_cache_ttl_seconds",
+            "label": "Host Pre-check Cache (seconds)",
+            "type": "number",
+            "default": 60,
+            "help_text": "How long DNS and connection results for a host are reused before it is checked again. Default: 60",
+        },
+        {
+            "id": "max_concurrent_probes",
+            "label": "Max Concurrent Probes",
+            "type": "number",
+            "default": 1,
+            "help_text": "Maximum number of streams probed at the same time. The resource governor lowers this under load. Default: 1",
+        },
+        {
+            "id": "governor_max_load",
+            "label": "Governor: Max Load per CPU",
+            "type": "number",
+            "default": 0.8,
+            "help_text": "Reduce concurrent probes while the 1-minute load average per CPU is above this value. 0 = disabled.",
+        },
+        {
+            "id": "governor_min_free_mb",
+            "label": "Governor: Min Free Memory (MB)",
+            "type": "number",
+            "default": 512,
+            "help_text": "Run only one probe at a time while available memory is below this value. 0 = disabled.",
+        },
+        {
+            "id": "governor_max_active_clients",
+            "label": "Governor: Max Active Clients",
+            "type": "number",
+            "default": 0,
+            "help_text": "Pause probing while more than this many clients are watching streams through Dispatcharr. 0 = disabled.",
+        },
+        {
+            "id": "probe_low_priority",
+            "label": "Run Probes at Low Priority",
+            "type": "boolean",
+            "default": True,
+            "help_text": "Run ffprobe with lower CPU (nice) and I/O (ionice) priority so live playback is served first.",
+        },
+        {
+            "id": "probe_memory_limit_mb",
+            "label": "Probe Memory Limit (MB)",
+            "type": "number",
+            "default": 0,
+            "help_text": "Cap the address space of each ffprobe process. 0 = unlimited.",
+        },
+        {
+            "id": "time_budget_minutes",
+            "label": "Time Budget (minutes)",
+            "type": "number",
+            "default": 0,
+            "help_text": "Stop checking cleanly once this many minutes have passed. Unchecked streams are carried over to the next run. 0 = no limit.",
+        },
+        {
+            "id": "priority_ordering",
+            "label": "Check Streams by Priority",
+            "type": "boolean",
+            "default": False,
+            "help_text": "Check the streams most likely to have changed first (previously dead, flapping, never checked, priority groups) instead of in load order.",
+        },
+        {
+            "id": "priority_groups",
+            "label": "Priority Groups (comma-separated)",
+            "type": "string",
+            "default": "",
+            "help_text": "Channel groups whose streams should be checked first when priority ordering is enabled.",
+        },
+        {
+            "id": "priority_weights",
+            "label": "Priority Weights",
+            "type": "string",
+            "default": "carryover=50, unchecked=40, dead=30, flapping=20, group=10",
+            "help_text": "Score added for each condition when ordering by priority. Higher scores are checked first.",
+        },
+        {
+            "id": "performance_profiling",
+            "label": "Measure Stream Performance",
+            "type": "boolean",
+            "default": False,
+            "help_text": "For alive streams, also measure connect time, time to first byte, time to first video frame and sustained bitrate. Adds the sample window to each check.",
+        },
+        {
+            "id": "profiling_sample_seconds",
+            "label": "Performance Sample Window (seconds)",
+            "type": "number",
+            "default": 10,
+            "help_text": "How long to read each stream when measuring sustained bitrate and throughput. Default: 10",
+        },
+        {
+            "id": "slow_stream_criteria",
+            "label": "Slow Stream Criteria",
+            "type": "string",
+            "default": "",
+            "placeholder": "startup > 5, throughput_ratio < 1",
+            "help_text": "Extra conditions (comma-separated, any match) that mark a stream as slow for the Low Framerate rename/move actions. Fields: startup, probe, connect, ttfb (seconds), bitrate, throughput (kbps), throughput_ratio, bitrate_ratio, fps.",
+        },
+        {
+            "id": "ranking_latency_tolerance_ms",
+            "label": "Stream Ranking: Latency Tolerance (ms)",
+            "type": "number",
+            "default": 500,
+            "help_text": "Streams whose startup latency is within this of the fastest comparable stream are treated as equally fast and ranked by resolution and framerate instead. Default: 500",
+        },
+        {
+            "id": "schedule_period_hours",
+            "label": "Schedule: Full Recheck Period (hours)",
+            "type": "number",
+            "default": 24,
+            "help_text": "The scheduler checks every loaded stream once per period, spread evenly over slices. Default: 24",
+        },
+        {
+            "id": "schedule_slice_minutes",
+            "label": "Schedule: Slice Interval (minutes)",
+            "type": "number",
+            "default": 60,
+            "help_text": "How often the scheduler reloads the groups and checks the next slice of streams. Default: 60",
+        },
+        {
+            "id": "schedule_apply_actions",
+            "label": "Schedule: Actions After Each Slice",
+            "type": "string",
+            "default": "",
+            "placeholder": "rename_channels, move_dead_channels",
+            "help_text": "Comma-separated action ids to run after each slice: rename_channels, move_dead_channels, rename_low_framerate_channels, move_low_framerate_channels, add_video_format_suffix, reorder_streams.",
+        },
+        {
+            "id": "metrics_textfile",
+            "label": "Metrics: Textfile Path",
+            "type": "string",
+            "default": "/data/iptv_checker.prom",
+            "help_text": "Write Prometheus metrics to this file after each run, for node_exporter's textfile collector. Leave blank to disable.",
+        },
+        {
+            "id": "metrics_port",
+            "label": "Metrics: HTTP Port",
+            "type": "number",
+            "default": 0,
+            "help_text": "Serve Prometheus metrics at http://<host>:<port>/metrics. 0 disables the endpoint. Default: 0",
         },
         {
             "id": "dead_prefix",
@@ -125,6 +1094,65 @@ class Plugin:
             "type": "string",
             "default": "4k, FHD, HD, SD, Unknown",
             "help_text": "A comma-separated list of formats to add as a suffix (e.g., [HD]) to channel names.",
+        },
+        {
+            "id": "table_status_filter",
+            "label": "Results Table: Status Filter",
+            "type": "string",
+            "default": "",
+            "placeholder": "Dead",
+            "help_text": "Only show rows with these statuses in 'View Results Table' (comma-separated). Leave blank for all.",
+        },
+        {
+            "id": "table_error_type_filter",
+            "label": "Results Table: Error Type Filter",
+            "type": "string",
+            "default": "",
+            "placeholder": "Timeout, 404 Not Found",
+            "help_text": "Only show rows with these error types (comma-separated). Leave blank for all.",
+        },
+        {
+            "id": "table_format_filter",
+            "label": "Results Table: Format Filter",
+            "type": "string",
+            "default": "",
+            "placeholder": "HD, FHD",
+            "help_text": "Only show rows with these video formats (comma-separated). Leave blank for all.",
+        },
+        {
+            "id": "table_group_filter",
+            "label": "Results Table: Group Filter",
+            "type": "string",
+            "default": "",
+            "help_text": "Only show rows from these channel groups (comma-separated). Leave blank for all.",
+        },
+        {
+            "id": "table_fps_min",
+            "label": "Results Table: Minimum FPS",
+            "type": "number",
+            "default": 0,
+            "help_text": "Only show rows with at least this framerate. 0 = no minimum.",
+        },
+        {
+            "id": "table_fps_max",
+            "label": "Results Table: Maximum FPS",
+            "type": "number",
+            "default": 0,
+            "help_text": "Only show rows with at most this framerate. 0 = no maximum.",
+        },
+        {
+            "id": "table_page",
+            "label": "Results Table: Page",
+            "type": "number",
+            "default": 1,
+            "help_text": "Page of matching rows to show in 'View Results Table'.",
+        },
+        {
+            "id": "table_page_size",
+            "label": "Results Table: Rows per Page",
+            "type": "number",
+            "default": 100,
+            "help_text": "Number of rows shown per page in 'View Results Table'. Default: 100",
         }
     ]
     
@@ -145,33 +1173,66 @@ class Plugin:
             "label": "Get Status Update",
             "description": "Internal action for retrieving periodic status updates during stream checking.",
         },
+        {
+            "id": "stop_check",
+            "label": "Stop Check",
+            "description": "Stop the running check, terminate in-flight probes and save the partial results. Unchecked streams are carried over to the next run.",
+            "confirm": { "required": True, "title": "Stop Check?", "message": "This will stop the running check and save partial results. Continue?" }
+        },
+        {
+            "id": "pause_resume_check",
+            "label": "Pause/Resume Check",
+            "description": "Pause the running check (terminating in-flight probes) or resume a paused check.",
+        },
+        {
+            "id": "start_scheduler",
+            "label": "Start Scheduler",
+            "description": "Save the current settings as the schedule and start rolling rechecks in the background.",
+            "confirm": { "required": True, "title": "Start Scheduler?", "message": "This will periodically load groups, check streams and run the configured actions. Continue?" }
+        },
+        {
+            "id": "stop_scheduler",
+            "label": "Stop Scheduler",
+            "description": "Disable the schedule and stop a scheduled slice that is in progress.",
+        },
+        {
+            "id": "scheduler_status",
+            "label": "Scheduler Status",
+            "description": "Show the schedule, rolling progress and the result of the last slice.",
+        },
         {
             "id": "get_results",
             "label": "View Last Results",
             "description": "Display live progress if a check is running or summary of the last check.",
         },
+        {
+            "id": "reorder_streams",
+            "label": "Reorder Channel Streams by Quality",
+            "description": "Reorder each channel's streams so the fastest healthy stream is tried first and dead streams come last.",
+            "confirm": { "required": True, "title": "Reorder Channel Streams?", "message": "This will change the stream order of checked channels in Dispatcharr. Continue?" }
+        },
         {
             "id": "rename_channels",
             "label": "Rename Dead Channels",
-            "description": "Rename all channels marked as 'Dead' in the last check, based on prefix/suffix settings.",
+            "description": "Rename all channels whose streams were all 'Dead' in the last check, based on prefix/suffix settings.",
             "confirm": { "required": True, "title": "Rename Dead Channels?", "message": "This action is irreversible. Continue?" }
         },
         {
             "id": "move_dead_channels",
             "label": "Move Dead Channels to Group",
-            "description": "Moves all channels marked as 'Dead' in the last check to the specified group.",
+            "description": "Moves all channels whose streams were all 'Dead' in the last check to the specified group.",
             "confirm": { "required": True, "title": "Move Dead Channels?", "message": "This action is irreversible. Continue?" }
         },
         {
             "id": "rename_low_framerate_channels",
             "label": "Rename Low Framerate Channels",
-            "description": "Rename channels with streams under 30fps based on prefix/suffix settings.",
+            "description": "Rename channels with streams under 30fps or matching the Slow Stream Criteria based on prefix/suffix settings.",
             "confirm": { "required": True, "title": "Rename Low Framerate Channels?", "message": "This action is irreversible. Continue?" }
         },
         {
             "id": "move_low_framerate_channels",
             "label": "Move Low Framerate Channels to Group",
-            "description": "Moves channels with streams under 30fps to the specified group.",
+            "description": "Moves channels with streams under 30fps or matching the Slow Stream Criteria to the specified group.",
             "confirm": { "required": True, "title": "Move Low Framerate Channels?", "message": "This action is irreversible. Continue?" }
         },
         {
@@ -195,19 +1256,53 @@ class Plugin:
             "id": "export_results",
             "label": "Export Results to CSV",
             "description": "Export the last check results to a CSV file. Will be saved in Docker container: /data/exports/"
+        },
+        {
+            "id": "export_results_jsonl",
+            "label": "Export Results to JSONL (gzip)",
+            "description": "Export the last check results as gzip-compressed JSON Lines. Will be saved in Docker container: /data/exports/"
+        },
+        {
+            "id": "export_alive_m3u",
+            "label": "Export Alive Streams to M3U",
+            "description": "Export the streams found alive in the last check as an M3U playlist. Will be saved in Docker container: /data/exports/"
         }
     ]
     
+    # Actions the scheduler may run after each slice, mapped to their handlers
+    SCHEDULABLE_ACTIONS = {
+        "rename_channels": "rename_channels_action",
+        "move_dead_channels": "move_dead_channels_action",
+        "rename_low_framerate_channels": "rename_low_framerate_channels_action",
+        "move_low_framerate_channels": "move_low_framerate_channels_action",
+        "add_video_format_suffix": "add_video_format_suffix_action",
+        "reorder_streams": "reorder_streams_action",
+    }
+
     def __init__(self):
         self.results_file = "/data/iptv_checker_results.json"
         self.loaded_channels_file = "/data/iptv_checker_loaded_channels.json"
-        self.check_progress = {"current": 0, "total": 0, "status": "idle", "start_time": None}
+        self.history_file = "/data/iptv_checker_history.json"
+        self.pending_file = "/data/iptv_checker_pending.json"
+        self.schedule_file = "/data/iptv_checker_schedule.json"
+        self.schedule_lock_file = "/data/iptv_checker_schedule.lock"
+        self.scheduler_lock_file = "/data/iptv_checker_scheduler.lock"
+        self.state_file = "/data/iptv_checker_state.json"
+        self.state_lock_file = "/data/iptv_checker_state.lock"
+        self.run_state = SharedRunState(self.state_file, self.state_lock_file)
+        self.metrics_file = "/data/iptv_checker_metrics.json"
+        self.metrics_lock_file = "/data/iptv_checker_metrics.lock"
         self.status_thread = None
         self.stop_status_updates = False
         self.pending_status_message = None
         self.completion_message = None
-        self.timeout_retry_queue = []  # Queue for streams that timed out and need retry
+        self.retry_queue = []  # Queue for streams with transient failures that need a later retry
+        self.probe_governor = None
+        self.api_token = None
         LOGGER.info(f"{self.name} Plugin v{self.version} initialized")
+        # Resume a persisted schedule after a restart
+        if self._load_schedule().get('enabled'):
+            SCHEDULER.start(self)
 
     def run(self, action, params, context):
         """Main plugin entry point"""
@@ -217,20 +1312,29 @@ class Plugin:
         try:
             settings = context.get("settings", {})
             logger = context.get("logger", LOGGER)
+            self._ensure_metrics_server(settings, logger)
             
             action_map = {
                 "load_groups": self.load_groups_action,
                 "check_streams": self.check_streams_action,
                 "get_results": self.get_results_action,
                 "get_status_update": self.get_status_update_action,
+                "stop_check": self.stop_check_action,
+                "pause_resume_check": self.pause_resume_check_action,
+                "start_scheduler": self.start_scheduler_action,
+                "stop_scheduler": self.stop_scheduler_action,
+                "scheduler_status": self.scheduler_status_action,
                 "rename_channels": self.rename_channels_action,
                 "move_dead_channels": self.move_dead_channels_action,
                 "rename_low_framerate_channels": self.rename_low_framerate_channels_action,
                 "move_low_framerate_channels": self.move_low_framerate_channels_action,
                 "add_video_format_suffix": self.add_video_format_suffix_action,
+                "reorder_streams": self.reorder_streams_action,
                 "remove_bracket_tags": self.remove_tags_action,
                 "view_table": self.view_table_action,
                 "export_results": self.export_results_action,
+                "export_results_jsonl": self.export_results_jsonl_action,
+                "export_alive_m3u": self.export_alive_m3u_action,
             }
             
             if action not in action_map:
@@ -243,41 +1347,88 @@ class Plugin:
                 return action_map[action](settings, logger)
                 
         except Exception as e:
-            self.check_progress['status'] = 'idle'
             self._stop_status_updates()
             LOGGER.error(f"Error in plugin run: {str(e)}")
             return {"status": "error", "message": str(e)}
+        finally:
+            # Publish API latencies recorded by this action
+            if METRICS.pending:
+                self._flush_metrics(context.get("settings", {}), LOGGER)
+
+    def _ensure_metrics_server(self, settings, logger):
+        try:
+            port = int(settings.get("metrics_port", 0) or 0)
+        except (TypeError, ValueError):
+            port = 0
+        METRICS_SERVER.ensure(port, lambda: METRICS.render_store(self.metrics_file, self.metrics_lock_file), logger)
+
+    def _flush_metrics(self, settings, logger):
+        """Merge recorded metrics into the shared store and rewrite the metrics textfile."""
+        textfile = (settings.get("metrics_textfile", "/data/iptv_checker.prom") or "").strip()
+        try:
+            METRICS.flush(self.metrics_file, self.metrics_lock_file, textfile or None)
+        except Exception as e:
+            logger.warning(f"Failed to write metrics: {e}")
+
+    def _record_run_metrics(self, results, duration, outcome, carried_count):
+        """Record the outcome of a check run for the metrics export."""
+        breakdown = {}
+        for r in results:
+            labels = (r.status, r.error_type, r.job.group_name)
+            breakdown[labels] = breakdown.get(labels, 0) + 1
+        samples = [({"status": status, "error_type": error_type, "group": group}, count)
+                   for (status, error_type, group), count in breakdown.items()]
+        for labels, count in samples:
+            METRICS.inc("iptv_checker_stream_results_total", labels, count)
+        METRICS.inc("iptv_checker_runs_total", {"outcome": outcome})
+        METRICS.set_gauges("iptv_checker_last_run_streams", samples)
+        METRICS.set_gauges("iptv_checker_last_run_duration_seconds", [(None, round(duration, 3))])
+        METRICS.set_gauges("iptv_checker_last_run_throughput_streams_per_second", [(None, round(len(results) / duration, 4) if duration > 0 else 0)])
+        METRICS.set_gauges("iptv_checker_last_run_carried_over_streams", [(None, carried_count)])
+        METRICS.set_gauges("iptv_checker_last_run_timestamp_seconds", [(None, round(time.time()))])
+
+    def _format_progress(self, state, with_eta=True):
+        """Progress line for a running check from the shared run state."""
+        current, total = state.get('current', 0), state.get('total', 0)
+        percent = (current / total * 100) if total > 0 else 0
+        message = f"Checking streams {current}/{total} - {percent:.0f}% complete"
+        if not with_eta:
+            return message
+
+        # Calculate ETA and throughput
+        if state.get('start_time') and current > 0:
+            elapsed_seconds = time.time() - state['start_time']
+            avg_time_per_stream = elapsed_seconds / current
+            remaining_streams = total - current
+            eta_seconds = remaining_streams * avg_time_per_stream
+            eta_minutes = eta_seconds / 60
+            
+            if eta_minutes < 1:
+                eta_str = f"ETA: <1 min"
+            else:
+                eta_str = f"ETA: {eta_minutes:.0f} min"
+            eta_str += f" | {current / elapsed_seconds * 60:.1f} streams/min"
+        else:
+            eta_str = "ETA: calculating..."
+
+        message += f" | {eta_str}"
+        if state.get('control') == 'pause':
+            message += " | Paused"
+        return message
 
     def get_status_update_action(self, settings, logger, context):
         """Return pending status update with ETA if available"""
         
         # Check if we have a completion message
-        if self.completion_message:
-            message = self.completion_message
-            self.completion_message = None  # Clear after reading
+        message = self.run_state.take_completion_message()
+        if message:
             return {"status": "success", "message": message}
         
-        if self.check_progress['status'] == 'running':
-            current, total = self.check_progress['current'], self.check_progress['total']
-            percent = (current / total * 100) if total > 0 else 0
-            
-            # Calculate ETA
-            if self.check_progress.get('start_time') and current > 0:
-                elapsed_seconds = time.time() - self.check_progress['start_time']
-                avg_time_per_stream = elapsed_seconds / current
-                remaining_streams = total - current
-                eta_seconds = remaining_streams * avg_time_per_stream
-                eta_minutes = eta_seconds / 60
-                
-                if eta_minutes < 1:
-                    eta_str = f"ETA: <1 min"
-                else:
-                    eta_str = f"ETA: {eta_minutes:.0f} min"
-            else:
-                eta_str = "ETA: calculating..."
-            
-            message = f"Checking streams {current}/{total} - {percent:.0f}% complete | {eta_str}"
-            return {"status": "success", "message": message}
+        state = self.run_state.read()
+        if self.run_state.is_active(state):
+            return {"status": "success", "message": self._format_progress(state)}
+        if state.get('status') == 'running':
+            return {"status": "info", "message": f"The last check (run {state.get('run_id')}) stopped responding at {state.get('current', 0)}/{state.get('total', 0)} streams. A new check can be started."}
         
         if self.pending_status_message:
             message = self.pending_status_message
@@ -286,6 +1437,34 @@ class Plugin:
         
         return {"status": "info", "message": "No status update available"}
 
+    def stop_check_action(self, settings, logger):
+        """Stop the running check; the worker saves partial results and carries the rest over."""
+        state = self.run_state.read()
+        if not self.run_state.is_active(state):
+            return {"status": "info", "message": "No check is currently running."}
+        logger.info(f"Stop requested for stream check run {state.get('run_id')}")
+        self.run_state.update(state.get('run_id'), control="stop")
+        if CHECK_CONTROL.running:
+            CHECK_CONTROL.request_stop()  # The worker is in this process, stop it right away
+        return {"status": "success", "message": "Stop requested. In-flight probes are terminated; partial results will be saved and unchecked streams carried over to the next run."}
+
+    def pause_resume_check_action(self, settings, logger):
+        """Pause the running check, or resume it if it is paused."""
+        state = self.run_state.read()
+        if not self.run_state.is_active(state):
+            return {"status": "info", "message": "No check is currently running."}
+        if state.get('control') == 'pause':
+            self.run_state.update(state.get('run_id'), control="run")
+            if CHECK_CONTROL.running:
+                CHECK_CONTROL.resume()
+            logger.info("Stream check resumed")
+            return {"status": "success", "message": "Stream check resumed."}
+        self.run_state.update(state.get('run_id'), control="pause")
+        if CHECK_CONTROL.running:
+            CHECK_CONTROL.pause()
+        logger.info("Stream check paused")
+        return {"status": "success", "message": "Stream check paused. In-flight probes are terminated and will be re-checked on resume."}
+
     def _start_status_updates(self, context):
         """Start background thread for status updates"""
         if self.status_thread and self.status_thread.is_alive():
@@ -304,16 +1483,13 @@ class Plugin:
 
     def _status_update_loop(self, context):
         """Background loop to generate status updates every minute"""
-        while not self.stop_status_updates and self.check_progress['status'] == 'running':
+        while not self.stop_status_updates and self.run_state.is_active(self.run_state.read()):
             time.sleep(60)  # Wait 60 seconds
             
-            if self.check_progress['status'] == 'running' and not self.stop_status_updates:
-                current = self.check_progress['current']
-                total = self.check_progress['total']
-                percent = (current / total * 100) if total > 0 else 0
-                
+            state = self.run_state.read()
+            if self.run_state.is_active(state) and not self.stop_status_updates:
                 # Store the status message for retrieval
-                self.pending_status_message = f"Checking streams {current}/{total} - {percent:.0f}% complete"
+                self.pending_status_message = self._format_progress(state, with_eta=False)
                 
                 # Log for debugging
                 logger = context.get("logger", LOGGER)
@@ -331,7 +1507,8 @@ class Plugin:
         try:
             url = f"{dispatcharr_url}/api/accounts/token/"
             payload = {"username": username, "password": password}
-            response = requests.post(url, json=payload, timeout=15)
+            with METRICS.time_api("POST", "/api/accounts/token/"):
+                response = requests.post(url, json=payload, timeout=15)
 
             if response.status_code == 401:
                 return None, "Authentication failed. Please check your username and password."
@@ -354,8 +1531,9 @@ class Plugin:
         dispatcharr_url = settings.get("dispatcharr_url", "").strip().rstrip('/')
         url = f"{dispatcharr_url}{endpoint}"
         headers = {'Authorization': f'Bearer {token}', 'Accept': 'application/json'}
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
+        with METRICS.time_api("GET", endpoint):
+            response = requests.get(url, headers=headers, timeout=30)
+            response.raise_for_status()
         
         json_data = response.json()
         if isinstance(json_data, dict):
@@ -369,8 +1547,19 @@ class Plugin:
         dispatcharr_url = settings.get("dispatcharr_url", "").strip().rstrip('/')
         url = f"{dispatcharr_url}{endpoint}"
         headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
-        response.raise_for_status()
+        with METRICS.time_api("POST", endpoint):
+            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response.raise_for_status()
+        return response.json()
+
+    def _patch_api_data(self, endpoint, token, payload, settings):
+        """Helper to perform PATCH requests to the Dispatcharr API."""
+        dispatcharr_url = settings.get("dispatcharr_url", "").strip().rstrip('/')
+        url = f"{dispatcharr_url}{endpoint}"
+        headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+        with METRICS.time_api("PATCH", endpoint):
+            response = requests.patch(url, headers=headers, json=payload, timeout=30)
+            response.raise_for_status()
         return response.json()
 
     def _trigger_m3u_refresh(self, token, settings, logger):
@@ -393,6 +1582,7 @@ class Plugin:
             group_names_str = settings.get("group_names", "").strip()
             all_groups = self._get_api_data("/api/channels/groups/", token, settings)
             group_name_to_id = {g['name']: g['id'] for g in all_groups if 'name' in g and 'id' in g}
+            group_id_to_name = {gid: name for name, gid in group_name_to_id.items()}
 
             if not group_names_str:
                 target_group_names, target_group_ids = set(group_name_to_id.keys()), set(group_name_to_id.values())
@@ -409,7 +1599,7 @@ class Plugin:
                 if channel.get('channel_group_id') in target_group_ids:
                     logger.info(f"Fetching streams for channel: {channel.get('name')}")
                     channel_streams = self._get_api_data(f"/api/channels/channels/{channel['id']}/streams/", token, settings)
-                    loaded_channels.append({**channel, "streams": channel_streams})
+                    loaded_channels.append({**channel, "group_name": group_id_to_name.get(channel.get('channel_group_id'), ''), "streams": channel_streams})
             
             with open(self.loaded_channels_file, 'w') as f: json.dump(loaded_channels, f)
 
@@ -419,7 +1609,8 @@ class Plugin:
             timeout = settings.get("timeout", 10)
             retries = settings.get("dead_connection_retries", 3)
             # More realistic estimate: ~8-10 seconds average per stream + 20% buffer
-            estimated_seconds = total_streams * 8.5 * 1.2  # Add 20% extra time
+            max_concurrent = max(1, int(settings.get("max_concurrent_probes", 1) or 1))
+            estimated_seconds = total_streams * 8.5 * 1.2 / max_concurrent  # Add 20% extra time
             estimated_minutes = estimated_seconds / 60
             
             message = f"Successfully loaded {len(loaded_channels)} channels with {total_streams} streams from {group_msg}."
@@ -439,115 +1630,541 @@ class Plugin:
         with open(self.loaded_channels_file, 'r') as f: 
             loaded_channels = json.load(f)
         
-        all_streams = [
-            {"channel_id": ch['id'], "channel_name": ch['name'], "stream_url": s['url'], "stream_id": s['id']}
-            for ch in loaded_channels for s in ch.get('streams', []) if s.get('url')
-        ]
+        all_streams = self._build_stream_jobs(loaded_channels)
         
         if not all_streams: 
             return {"status": "error", "message": "The loaded groups contain no streams to check."}
 
-        self.check_progress = {"current": 0, "total": len(all_streams), "status": "running", "start_time": time.time()}
-        logger.info(f"Starting check for {len(all_streams)} streams...")
-        
-        # Start background status updates
-        if context:
-            self._start_status_updates(context)
-        
-        # Return immediately to avoid timeout, processing continues in background
-        timeout = settings.get("timeout", 10)
-        estimated_total_time = len(all_streams) * 8.5 * 1.2 / 60  # More realistic estimate with 20% buffer
-        
-        # Start the actual processing in background
-        import threading
-        processing_thread = threading.Thread(
-            target=self._process_streams_background, 
-            args=(all_streams, settings, logger)
-        )
-        processing_thread.daemon = True
-        processing_thread.start()
-        
-        return {"status": "success", "message": f"Stream checking started for {len(all_streams)} streams.\nEstimated completion time: {estimated_total_time:.0f} minutes.\n\nUse 'Get Status Update' or 'View Last Results' to monitor progress."}
+        if not CHECK_CONTROL.try_begin():
+            return {"status": "error", "message": "A stream check is already running. Use 'Stop Check' or wait for it to finish."}
+        try:
+            run_id = self.run_state.begin(len(all_streams))
+        except Exception:
+            CHECK_CONTROL.end()
+            raise
+        if not run_id:
+            CHECK_CONTROL.end()
+            state = self.run_state.read()
+            return {"status": "error", "message": f"A stream check is already running (run {state.get('run_id')}, {state.get('current', 0)}/{state.get('total', 0)} streams). Use 'Stop Check' or wait for it to finish."}
 
-    def _process_streams_background(self, all_streams, settings, logger):
-        """Background processing of streams to avoid request timeout"""
-        results = []
-        timeout = settings.get("timeout", 10)
-        retries = settings.get("dead_connection_retries", 3)
-        self.timeout_retry_queue = []
-        streams_processed_since_retry = 0
+        try:
+            all_streams = self._order_streams(all_streams, settings, logger)
+            CHECK_CONTROL.reset()
+
+            logger.info(f"Starting check run {run_id} for {len(all_streams)} streams...")
+
+            # Start background status updates
+            if context:
+                self._start_status_updates(context)
+
+            # Return immediately to avoid timeout, processing continues in background
+            timeout = settings.get("timeout", 10)
+            max_concurrent = max(1, int(settings.get("max_concurrent_probes", 1) or 1))
+            estimated_total_time = len(all_streams) * 8.5 * 1.2 / 60 / max_concurrent  # More realistic estimate with 20% buffer
+            budget_minutes = float(settings.get("time_budget_minutes", 0) or 0)
+
+            # Start the actual processing in background
+            processing_thread = threading.Thread(
+                target=self._process_streams_background, 
+                args=(all_streams, settings, logger, run_id)
+            )
+            processing_thread.daemon = True
+            processing_thread.start()
+        except Exception as e:
+            # Release the claim so the failure doesn't block later checks in this or other processes
+            self._stop_status_updates()
+            CHECK_CONTROL.end()
+            self.run_state.finish(run_id, f"Stream checking failed to start: {e}")
+            raise
+
+        message = f"Stream checking started for {len(all_streams)} streams.\nEstimated completion time: {estimated_total_time:.0f} minutes."
+        if budget_minutes > 0:
+            message += f"\nTime budget: {budget_minutes:.0f} minutes. Streams not reached will be carried over to the next run."
+        return {"status": "success", "message": message + "\n\nUse 'Get Status Update' or 'View Last Results' to monitor progress."}
+
+    def _build_stream_jobs(self, loaded_channels):
+        """Flatten loaded channels into one job per stream."""
+        return [
+            StreamJob(ch['id'], ch['name'], ch.get('group_name', ''), s['url'], s['id'])
+            for ch in loaded_channels for s in ch.get('streams', []) if s.get('url')
+        ]
 
+    def _load_schedule(self):
+        return self._load_json_file(self.schedule_file, {})
+
+    def _update_schedule(self, **changes):
+        """Merge changes into the persisted schedule. The file holds credentials, so it is owner-only."""
+        # Locked so a concurrent update (e.g. a stop while a slice records its position) isn't overwritten
+        with file_lock(self.schedule_lock_file):
+            schedule = {**self._load_schedule(), **changes}
+            write_file_atomic(self.schedule_file, json.dumps(schedule), mode=0o600)
+        return schedule
+
+    def start_scheduler_action(self, settings, logger):
+        """Persist the schedule from the current settings and start the scheduler thread."""
+        period_hours = float(settings.get("schedule_period_hours", 24) or 0)
+        slice_minutes = float(settings.get("schedule_slice_minutes", 60) or 0)
+        if period_hours <= 0 or slice_minutes <= 0:
+            return {"status": "error", "message": "Schedule period and slice interval must be greater than 0."}
+        if slice_minutes > period_hours * 60:
+            return {"status": "error", "message": "The slice interval cannot be longer than the full recheck period."}
+
+        apply_actions = [a.strip() for a in (settings.get("schedule_apply_actions", "") or "").split(',') if a.strip()]
+        invalid = [a for a in apply_actions if a not in self.SCHEDULABLE_ACTIONS]
+        if invalid:
+            return {"status": "error", "message": f"Unknown scheduled action(s): {', '.join(invalid)}. Allowed: {', '.join(self.SCHEDULABLE_ACTIONS)}"}
+
+        if not all(settings.get(k) for k in ("dispatcharr_url", "dispatcharr_username", "dispatcharr_password")):
+            return {"status": "error", "message": "Dispatcharr URL, Username, and Password must be configured."}
+
+        previous = self._load_schedule()
+        self._update_schedule(enabled=True, period_hours=period_hours, slice_minutes=slice_minutes, apply_actions=apply_actions,
+                              settings=settings, cursor=previous.get('cursor', 0), next_run=time.time())
+        SCHEDULER.start(self)
+        slices = max(1, round(period_hours * 60 / slice_minutes))
+        logger.info(f"Scheduler enabled: {slices} slices every {slice_minutes:.0f} minutes over {period_hours:g} hours")
+        return {"status": "success", "message": f"Scheduler started. Every {slice_minutes:.0f} minutes about 1/{slices} of the library is checked, so all streams are rechecked every {period_hours:g} hours. The first slice starts now."}
+
+    def stop_scheduler_action(self, settings, logger):
+        """Disable the persisted schedule and stop the scheduler thread."""
+        if not self._load_schedule().get('enabled') and not SCHEDULER.running:
+            return {"status": "info", "message": "The scheduler is not running."}
+        self._update_schedule(enabled=False)
+        SCHEDULER.stop()
+        state = self.run_state.read()
+        if self.run_state.is_active(state) and state.get('origin') == 'scheduler':
+            # The slice may be running in another process
+            self.run_state.update(state.get('run_id'), control="stop")
+        return {"status": "success", "message": "Scheduler stopped. The rolling position is kept for the next start."}
+
+    def scheduler_status_action(self, settings, logger):
+        """Show the persisted schedule and the last slice result."""
+        schedule = self._load_schedule()
+        if not schedule:
+            return {"status": "info", "message": "No schedule configured. Use 'Start Scheduler' to create one."}
+        lines = [f"Scheduler: {'enabled' if schedule.get('enabled') else 'disabled'}",
+                 f"• Full recheck every {schedule.get('period_hours', 0):g} hours in slices every {schedule.get('slice_minutes', 0):.0f} minutes"]
+        if schedule.get('library_size'):
+            lines.append(f"• Rolling position: {schedule.get('cursor', 0)}/{schedule['library_size']} streams (completed cycles: {schedule.get('cycles', 0)})")
+        if schedule.get('apply_actions'):
+            lines.append(f"• Actions after each slice: {', '.join(schedule['apply_actions'])}")
+        if schedule.get('enabled') and schedule.get('next_run'):
+            lines.append(f"• Next slice: {datetime.fromtimestamp(schedule['next_run']).strftime('%Y-%m-%d %H:%M')}")
+        if schedule.get('last_run'):
+            lines.append(f"• Last slice: {schedule['last_run']} - {schedule.get('last_message', '')}")
+        return {"status": "success", "message": "\n".join(lines)}
+
+    def _run_scheduled_slice(self, schedule, logger):
+        """Reload the groups and check the next slice of the library, then apply the configured actions."""
+        settings = schedule.get('settings', {})
+        slice_minutes = float(schedule.get('slice_minutes', 60))
+        period_hours = float(schedule.get('period_hours', 24))
+        self._ensure_metrics_server(settings, logger)
+        # Book the next slot first so failures don't cause a tight loop
+        self._update_schedule(next_run=time.time() + slice_minutes * 60, last_run=datetime.now().isoformat(timespec='seconds'))
+
+        if CHECK_CONTROL.running or self.run_state.is_active(self.run_state.read()):
+            self._update_schedule(last_message="Skipped: another check was already running.")
+            return
+
+        load_result = self.load_groups_action(settings, logger)
+        if load_result.get('status') != 'success':
+            self._update_schedule(last_message=f"Loading groups failed: {load_result.get('message')}")
+            return
+
+        with open(self.loaded_channels_file, 'r') as f:
+            jobs = sorted(self._build_stream_jobs(json.load(f)), key=lambda j: j.key)
+        if not jobs:
+            self._update_schedule(last_message="The loaded groups contain no streams to check.")
+            return
+
+        # Take the next slice of a stable ordering; streams left over from the previous slice come first
+        slices = max(1, round(period_hours * 60 / slice_minutes))
+        slice_size = math.ceil(len(jobs) / slices)
+        cursor = schedule.get('cursor', 0) % len(jobs)
+        chunk = jobs[cursor:cursor + slice_size]
+        next_cursor, cycles = cursor + len(chunk), schedule.get('cycles', 0)
+        if next_cursor >= len(jobs):
+            next_cursor, cycles = 0, cycles + 1
+        chunk_keys = {j.key for j in chunk}
+        carried_over = set(self._load_json_file(self.pending_file, [])) - chunk_keys
+        slice_jobs = self._order_streams([j for j in jobs if j.key in carried_over] + chunk, settings, logger)
+
+        if not CHECK_CONTROL.try_begin():
+            self._update_schedule(last_message="Skipped: another check was already running.")
+            return
+        run_id = self.run_state.begin(len(slice_jobs), origin="scheduler")
+        if not run_id:
+            CHECK_CONTROL.end()
+            self._update_schedule(last_message="Skipped: another check was already running.")
+            return
+        CHECK_CONTROL.reset()
+        logger.info(f"Scheduled slice run {run_id}: checking {len(slice_jobs)} streams (position {cursor}/{len(jobs)})")
+        # Leave some headroom so a slice finishes before the next one is due
+        slice_settings = {**settings, "time_budget_minutes": slice_minutes * 0.9}
+        outcome = self._process_streams_background(slice_jobs, slice_settings, logger, run_id, merge_results=True,
+                                                   library_keys={j.key for j in jobs})
+        message = self.completion_message or ""
+
+        # The scheduler may have been stopped from another process while the slice ran
+        if outcome in ("stopped", "error"):
+            skip_reason = "the slice did not finish"
+        elif SCHEDULER.stop_event.is_set() or not self._load_schedule().get('enabled'):
+            skip_reason = "the scheduler was stopped"
+        else:
+            skip_reason = None
+        if skip_reason:
+            if schedule.get('apply_actions'):
+                message += f" Actions skipped because {skip_reason}."
+        else:
+            for action_id in schedule.get('apply_actions', []):
+                action_result = getattr(self, self.SCHEDULABLE_ACTIONS[action_id])(settings, logger)
+                message += f" {action_id}: {action_result.get('message')}"
+
+        self._update_schedule(cursor=next_cursor, cycles=cycles, library_size=len(jobs), last_message=message.strip())
+        if METRICS.pending:
+            self._flush_metrics(settings, logger)
+
+    def _load_json_file(self, path, default):
+        """Read a JSON file, returning default if it is missing or unreadable."""
+        if not os.path.exists(path): return default
         try:
-            for i, stream_data in enumerate(all_streams):
-                if self.stop_status_updates:  # Allow early termination
-                    break
-                    
-                self.check_progress["current"] = i + 1
-                
-                # Check stream - NO immediate retries, we'll handle them in the background queue
-                result = self.check_stream(stream_data, timeout, 0, logger, skip_retries=True)
-                
-                # If stream timed out and we have retries enabled, add to retry queue
-                if result.get('error_type') == 'Timeout' and retries > 0:
-                    self.timeout_retry_queue.append({**stream_data, "retry_count": 0})
-                    logger.info(f"Added '{stream_data.get('channel_name')}' to retry queue due to timeout")
-                
-                results.append({**stream_data, **result})
-                streams_processed_since_retry += 1
-                
-                # Process timeout retry queue every 4 streams
-                if streams_processed_since_retry >= 4 and self.timeout_retry_queue:
-                    retry_stream = self.timeout_retry_queue.pop(0)
-                    retry_stream["retry_count"] += 1
-                    
-                    if retry_stream["retry_count"] <= retries:
-                        logger.info(f"Retrying timeout stream: '{retry_stream.get('channel_name')}' (attempt {retry_stream['retry_count']}/{retries})")
-                        retry_result = self.check_stream(retry_stream, timeout, 0, logger, skip_retries=True)  # No immediate retries
-                        
-                        # Update the original result in the results list
-                        for j, existing_result in enumerate(results):
-                            if (existing_result.get('channel_id') == retry_stream.get('channel_id') and 
-                                existing_result.get('stream_id') == retry_stream.get('stream_id')):
-                                results[j] = {**retry_stream, **retry_result}
-                                break
-                        
-                        # If still timing out, add back to queue for another retry
-                        if retry_result.get('error_type') == 'Timeout' and retry_stream["retry_count"] < retries:
-                            self.timeout_retry_queue.append(retry_stream)
-                    
-                    streams_processed_since_retry = 0
-                
-                # Add 3 second delay between stream checks
-                time.sleep(3)
-
-            # Process any remaining timeout retries
-            while self.timeout_retry_queue:
-                retry_stream = self.timeout_retry_queue.pop(0)
-                if retry_stream["retry_count"] < retries:
-                    retry_stream["retry_count"] += 1
-                    logger.info(f"Final retry for timeout stream: '{retry_stream.get('channel_name')}' (attempt {retry_stream['retry_count']}/{retries})")
-                    retry_result = self.check_stream(retry_stream, timeout, 0, logger, skip_retries=True)
-                    
-                    # Update the original result in the results list
-                    for j, existing_result in enumerate(results):
-                        if (existing_result.get('channel_id') == retry_stream.get('channel_id') and 
-                            existing_result.get('stream_id') == retry_stream.get('stream_id')):
-                            results[j] = {**retry_stream, **retry_result}
-                            break
-
-            with open(self.results_file, 'w') as f: 
-                json.dump(results, f, indent=2)
+            with open(path, 'r') as f: return json.load(f)
+        except (OSError, ValueError): return default
+
+    def _parse_priority_weights(self, settings):
+        """Parse 'name=score' pairs from the Priority Weights setting."""
+        weights = {"carryover": 50, "unchecked": 40, "dead": 30, "flapping": 20, "group": 10}
+        weights_str = settings.get("priority_weights", "") or ""
+        for item in weights_str.split(','):
+            if '=' not in item: continue
+            name, value = item.split('=', 1)
+            try:
+                weights[name.strip().lower()] = float(value)
+            except ValueError:
+                continue
+        return weights
+
+    def _order_streams(self, all_streams, settings, logger):
+        """Order streams for checking: carried-over streams first, or by priority score if enabled."""
+        carried_over = set(self._load_json_file(self.pending_file, []))
+
+        if not settings.get("priority_ordering", False):
+            if not carried_over: return all_streams
+            # Stable sort keeps load order within each bucket
+            return sorted(all_streams, key=lambda job: job.key not in carried_over)
+
+        weights = self._parse_priority_weights(settings)
+        history = self._load_json_file(self.history_file, {})
+        priority_groups = {g.strip() for g in (settings.get("priority_groups", "") or "").split(',') if g.strip()}
+
+        def score(job):
+            key = job.key
+            entry = history.get(key)
+            total = 0.0
+            if key in carried_over: total += weights.get("carryover", 0)
+            if entry is None:
+                total += weights.get("unchecked", 0)
+            else:
+                if entry.get("last_status") == "Dead": total += weights.get("dead", 0)
+                statuses = entry.get("statuses", [])
+                if any(a != b for a, b in zip(statuses, statuses[1:])): total += weights.get("flapping", 0)
+            if job.group_name in priority_groups: total += weights.get("group", 0)
+            return total
+
+        ordered = sorted(all_streams, key=score, reverse=True)
+        logger.info(f"Ordered {len(ordered)} streams by priority ({len(carried_over)} carried over from the last run)")
+        return ordered
+
+    def _update_history(self, results, logger):
+        """Record the latest statuses so future runs can prioritise dead and flapping streams."""
+        history = self._load_json_file(self.history_file, {})
+        for r in results:
+            entry = history.setdefault(r.job.key, {"statuses": []})
+            entry["statuses"] = (entry.get("statuses", []) + [r.status])[-5:]
+            entry["last_status"] = r.status
+            entry["last_checked"] = r.checked_at
+        try:
+            with open(self.history_file, 'w') as f: json.dump(history, f)
+        except OSError as e:
+            logger.error(f"Failed to save check history: {e}")
+
+    def _check_stream_resumable(self, job, timeout, logger):
+        """Check a stream, re-checking it after a pause. Returns None if the check was stopped."""
+        while True:
+            if not CHECK_CONTROL.wait_if_paused():
+                return None
+            result = self.check_stream(job, timeout, 0, logger, skip_retries=True)
+            if result.error_type != 'Cancelled':
+                return result
+            if CHECK_CONTROL.stopped:
+                return None
+            logger.info(f"Probe for '{job.channel_name}' interrupted by pause; will re-check on resume")
+
+    def _count_active_clients(self, settings, logger):
+        """Total clients currently connected to Dispatcharr's stream proxy, or None if unavailable."""
+        for attempt in range(2):
+            try:
+                if not self.api_token:
+                    self.api_token, error = self._get_api_token(settings, logger)
+                    if error:
+                        logger.warning(f"Cannot read active clients: {error}")
+                        return None
+                status = self._get_api_data("/proxy/ts/status", self.api_token, settings)
+                channels = status.get('channels', []) if isinstance(status, dict) else status
+                return sum(int(ch.get('client_count', 0) or 0) for ch in channels)
+            except requests.RequestException as e:
+                if attempt == 0 and getattr(getattr(e, 'response', None), 'status_code', None) == 401:
+                    self.api_token = None  # Token expired, fetch a new one
+                    continue
+                logger.warning(f"Failed to read active client count: {e}")
+                return None
+
+    def _precheck_hosts(self, all_streams, ttl, connect_timeout, logger):
+        """Check every distinct stream host in parallel to warm the reachability cache."""
+        streams_by_endpoint = {}
+        for job in all_streams:
+            endpoint = HostReachability.endpoint(job.stream_url)
+            if endpoint: streams_by_endpoint[endpoint] = streams_by_endpoint.get(endpoint, 0) + 1
+        if not streams_by_endpoint: return
+        endpoints = list(streams_by_endpoint)
+        with ThreadPoolExecutor(max_workers=min(16, len(endpoints))) as pool:
+            failures = list(pool.map(lambda e: HOST_REACHABILITY.check(e, ttl, connect_timeout), endpoints))
+        unreachable = [(e, f) for e, f in zip(endpoints, failures) if f]
+        for (host, port), (error_type, _, transient) in unreachable:
+            handling = "queued for a retry probe" if transient else "marked dead"
+            logger.info(f"Host {host}:{port} unreachable ({error_type}); its {streams_by_endpoint[(host, port)]} streams are {handling}")
+        logger.info(f"Host pre-check: {len(unreachable)} of {len(endpoints)} hosts unreachable, "
+                    f"{sum(streams_by_endpoint[e] for e, _ in unreachable)} streams affected")
+
+    def _monitor_run_state(self, run_id, done_event, progress_fn):
+        """Publish progress and heartbeat to the shared state, and apply stop/pause requests from other processes."""
+        while not done_event.wait(2):
+            try:
+                state = self.run_state.read()
+                # If another run has claimed the state, this one was considered dead and must stop
+                control = 'stop' if state and state.get('run_id') != run_id else state.get('control')
+                if control == 'stop' and not CHECK_CONTROL.stopped:
+                    CHECK_CONTROL.request_stop()
+                elif control == 'pause' and not CHECK_CONTROL.paused:
+                    CHECK_CONTROL.pause()
+                elif control == 'run' and CHECK_CONTROL.paused:
+                    CHECK_CONTROL.resume()
+                self.run_state.update(run_id, heartbeat=time.time(), **progress_fn())
+            except Exception as e:
+                LOGGER.error(f"Failed to update shared run state: {e}")
+
+    def _process_streams_background(self, all_streams, settings, logger, run_id, merge_results=False, library_keys=None):
+        """Background processing of streams to avoid request timeout.
+
+        With merge_results, new rows replace older rows for the same stream in the results file
+        instead of replacing the whole file; rows for streams outside library_keys are dropped.
+        Returns the run outcome: "completed", "budget_exhausted", "stopped" or "error".
+        """
+        # Settings are parsed inside the try below, so a bad value still releases the run claim
+        results_by_index = {}
+        self.retry_queue = deque()
+        lock = threading.Lock()
+        checked = set()
+        counters = {"since_retry": 0}
+        budget_exhausted = False
+        error = None
+        run_started = time.monotonic()
+        monitor = None
+        monitor_done = threading.Event()
+
+        def run_job(index, job, retry_count):
+            # The slot is released only after the result and any retry are recorded, so the final
+            # retry loop never sees an empty queue and no active probes while a retry is pending
+            try:
+                if retry_count and host_precheck:
+                    # The retry probes the host itself; make the next pre-check on this host connect again too
+                    endpoint = HostReachability.endpoint(job.stream_url)
+                    if endpoint: HOST_REACHABILITY.invalidate(endpoint)
+                result = None
+                try:
+                    started = time.monotonic()
+                    result = self._check_stream_resumable(job, timeout, logger)
+                    if result is not None and profiling and result.status == 'Alive':
+                        result.update(**self._measure_stream_performance(job, timeout, sample_seconds, logger))
+                        if result.bitrate_kbps is not None and result.declared_bitrate_kbps:
+                            # Below 1 means the stream delivers less than it advertises
+                            result.bitrate_ratio = round(result.bitrate_kbps / result.declared_bitrate_kbps, 2)
+                    if result is not None:
+                        METRICS.observe("iptv_checker_probe_duration_seconds", time.monotonic() - started, {"status": result.status})
+                except Exception as e:
+                    logger.error(f"Error checking '{job.channel_name}': {e}")
+                if result is None:
+                    return
+
+                if host_precheck and result.error_type in HostReachability.HOST_ERROR_TYPES:
+                    # Re-check the host before the next stream on it instead of probing each one
+                    endpoint = HostReachability.endpoint(job.stream_url)
+                    if endpoint: HOST_REACHABILITY.invalidate(endpoint)
+                record_result(index, job, retry_count, result)
+                # Keep the slot for 3 seconds between checks for server stability
+                CHECK_CONTROL.sleep(3)
+            finally:
+                governor.release()
+
+        def record_result(index, job, retry_count, result):
+            if retry_count: result.retry_count = retry_count
+            with lock:
+                results_by_index[index] = result
+                if retry_count == 0:
+                    checked.add(index)
+                    counters["since_retry"] += 1
+                # Only transient failures (timeouts, 5xx, 429, resets) are worth a later retry
+                if result.transient and retry_count < retries:
+                    self.retry_queue.append((index, job, retry_count + 1))
+                    METRICS.inc("iptv_checker_retries_total", {"error_type": result.error_type})
+                    logger.info(f"Added '{job.channel_name}' to retry queue due to {result.error_type} (attempt {retry_count + 1}/{retries})")
+
+        def host_failure(job):
+            endpoint = HostReachability.endpoint(job.stream_url) if host_precheck else None
+            failure = endpoint and HOST_REACHABILITY.check(endpoint, host_ttl, connect_timeout)
+            if not failure: return None
+            error_type, error, transient = failure
+            # A transient host failure is only final if the stream can still be retried with a real probe
+            if transient and retries < 1: return None
+            return ProbeResult.probed(job, error=error, error_type=error_type, transient=transient,
+                                      diagnostics=f"Host {endpoint[0]}:{endpoint[1]} failed the pre-check")
+
+        def progress():
+            with lock:
+                alive = sum(1 for r in results_by_index.values() if r.status == 'Alive')
+                return {"current": len(checked), "alive": alive, "dead": len(results_by_index) - alive, "retry_queue": len(self.retry_queue)}
+
+        try:
+            timeout = int(float(settings.get("timeout", 10) or 10))
+            retries = settings.get("dead_connection_retries", 3)
+            retries = max(0, int(float(3 if retries in (None, "") else retries)))
+            budget_minutes = float(settings.get("time_budget_minutes", 0) or 0)
+            deadline = time.time() + budget_minutes * 60 if budget_minutes > 0 else None
+            profiling = bool(settings.get("performance_profiling", False))
+            sample_seconds = max(1, float(settings.get("profiling_sample_seconds", 10) or 10))
+            host_precheck = bool(settings.get("host_precheck", True))
+            host_ttl = max(1, float(settings.get("host_cache_ttl_seconds", 60) or 60))
+            connect_timeout = min(max(1, timeout), 5)
+            governor = ProbeGovernor(settings, logger, lambda: self._count_active_clients(settings, logger))
+            self.probe_governor = governor
+
+            monitor = threading.Thread(target=self._monitor_run_state, args=(run_id, monitor_done, progress))
+            monitor.daemon = True
+            monitor.start()
+
+            if host_precheck:
+                self._precheck_hosts(all_streams, host_ttl, connect_timeout, logger)
+
+            with ThreadPoolExecutor(max_workers=governor.max_concurrent) as pool:
+                for i, job in enumerate(all_streams):
+                    if CHECK_CONTROL.stopped:  # Allow early termination
+                        break
+
+                    # Streams on unreachable hosts skip the probe; transient host failures go to the retry queue
+                    unreachable = host_failure(job)
+                    if unreachable:
+                        record_result(i, job, 0, unreachable)
+                        continue
+
+                    if not governor.acquire(deadline):
+                        if not CHECK_CONTROL.stopped:
+                            budget_exhausted = True
+                            logger.info(f"Time budget of {budget_minutes:.0f} minutes reached after dispatching {i} streams")
+                        break
+                    pool.submit(run_job, i, job, 0)
+
+                    # Retry one transient failure for every 4 newly checked streams
+                    with lock:
+                        retry_job = None
+                        if counters["since_retry"] >= 4 and self.retry_queue:
+                            retry_job = self.retry_queue.popleft()
+                            counters["since_retry"] = 0
+                    if retry_job:
+                        if not governor.acquire(deadline):
+                            with lock: self.retry_queue.appendleft(retry_job)
+                            continue
+                        logger.info(f"Retrying stream: '{retry_job[1].channel_name}' (attempt {retry_job[2]}/{retries})")
+                        pool.submit(run_job, *retry_job)
+
+                # Process any remaining retries, including ones queued by in-flight probes
+                while not CHECK_CONTROL.stopped and not budget_exhausted:
+                    with lock:
+                        retry_job = self.retry_queue.popleft() if self.retry_queue else None
+                    if retry_job is None:
+                        if governor.active == 0: break
+                        time.sleep(0.5)
+                        continue
+                    if not governor.acquire(deadline):
+                        if not CHECK_CONTROL.stopped:
+                            budget_exhausted = True
+                            logger.info(f"Time budget reached, skipping {len(self.retry_queue) + 1} remaining retries")
+                        break
+                    logger.info(f"Final retry for stream: '{retry_job[1].channel_name}' (attempt {retry_job[2]}/{retries})")
+                    pool.submit(run_job, *retry_job)
+
+            if self.retry_queue:
+                # Drain pending retries; those streams keep their last result
+                logger.info(f"Dropping {len(self.retry_queue)} pending retries")
+                self.retry_queue.clear()
+
+            results = [results_by_index[i] for i in sorted(results_by_index)]
+            if not merge_results and len(checked) < len(all_streams):
+                # A stopped or budget-limited run keeps the previous rows of the streams it didn't reach
+                merge_results, library_keys = True, {job.key for job in all_streams}
+            if merge_results and os.path.exists(self.results_file):
+                new_rows = {r.job.key: r for r in results}
+                merged = []
+                for r in self._iter_results():
+                    key = r.job.key
+                    if key in new_rows:
+                        merged.append(new_rows.pop(key))
+                    elif library_keys is None or key in library_keys:
+                        merged.append(r)
+                self._write_results(merged + list(new_rows.values()))
+            else:
+                self._write_results(results)
+
+            # Streams that were never checked are checked first on the next run
+            carried_over = [job.key for i, job in enumerate(all_streams) if i not in checked]
+            with open(self.pending_file, 'w') as f:
+                json.dump(carried_over, f)
+
+            self._update_history(results, logger)
                 
         except Exception as e:
+            error = e
             logger.error(f"Background stream processing error: {e}")
         finally:
-            self.check_progress['status'] = 'idle'
+            monitor_done.set()
+            if monitor: monitor.join(timeout=5)
+            stopped = CHECK_CONTROL.stopped
+            CHECK_CONTROL.reset()
+            CHECK_CONTROL.end()
+            self.probe_governor = None
             self._stop_status_updates()
             
             # Set completion message
-            processed_count = len(results)
-            self.completion_message = f"Stream checking completed. Processed {processed_count} streams."
-            logger.info(f"Stream checking completed. Processed {processed_count} streams.")
+            processed_count = len(results_by_index)
+            carried_count = len(all_streams) - len(checked)
+            if error:
+                self.completion_message = f"Stream checking failed: {error}. Processed {processed_count} streams."
+            elif stopped:
+                self.completion_message = f"Stream checking stopped. Processed {processed_count} streams; {carried_count} streams carried over to the next run."
+            else:
+                self.completion_message = f"Stream checking completed. Processed {processed_count} streams."
+                if budget_exhausted:
+                    self.completion_message += f" Time budget reached; {carried_count} streams carried over to the next run."
+            logger.info(self.completion_message)
+            outcome = "error" if error else "stopped" if stopped else "budget_exhausted" if budget_exhausted else "completed"
+            self._record_run_metrics(list(results_by_index.values()), time.monotonic() - run_started, outcome, carried_count)
+            self._flush_metrics(settings, logger)
+            try:
+                self.run_state.update(run_id, **progress())
+                self.run_state.finish(run_id, self.completion_message)
+            except Exception as e:
+                logger.error(f"Failed to record check completion: {e}")
+        return outcome
 
     def rename_channels_action(self, settings, logger):
         """Rename channels that were marked as dead in the last check."""
@@ -559,9 +2176,7 @@ class Plugin:
         if not os.path.exists(self.results_file):
             return {"status": "error", "message": "No check results found. Please run 'Check Streams' first."}
             
-        with open(self.results_file, 'r') as f: results = json.load(f)
-            
-        dead_channels = {r['channel_id']: r['channel_name'] for r in results if r['status'] == 'Dead'}
+        dead_channels = self._dead_channels(settings, logger)
         if not dead_channels: return {"status": "success", "message": "No dead channels found in the last check."}
             
         payload = []
@@ -594,9 +2209,7 @@ class Plugin:
         if not os.path.exists(self.results_file):
             return {"status": "error", "message": "No check results found. Please run 'Check Streams' first."}
 
-        with open(self.results_file, 'r') as f: results = json.load(f)
-        
-        dead_channel_ids = {r['channel_id'] for r in results if r['status'] == 'Dead'}
+        dead_channel_ids = set(self._dead_channels(settings, logger))
         if not dead_channel_ids: return {"status": "success", "message": "No dead channels were found in the last check."}
         
         try:
@@ -622,6 +2235,94 @@ class Plugin:
 
         except Exception as e: return {"status": "error", "message": str(e)}
         
+    def _parse_slow_criteria(self, settings):
+        """Parse the Slow Stream Criteria setting into (result key, operator, threshold in result units)."""
+        criteria = []
+        for item in (settings.get("slow_stream_criteria", "") or "").split(','):
+            if not item.strip(): continue
+            match = SLOW_CRITERION_PATTERN.match(item)
+            if not match or match.group(1).lower() not in SLOW_CRITERIA_FIELDS:
+                return None, f"Invalid Slow Stream Criteria '{item.strip()}'. Use e.g. 'startup > 5' with fields: {', '.join(SLOW_CRITERIA_FIELDS)}."
+            key, scale = SLOW_CRITERIA_FIELDS[match.group(1).lower()]
+            criteria.append((key, match.group(2), float(match.group(3)) / scale))
+        return criteria, None
+
+    def _stream_latency_ms(self, r):
+        """Best available startup latency for a result: first frame if profiled, else the probe time."""
+        if r.first_frame_error:
+            # Profiled but never produced a frame: rank after every stream with a known latency
+            return None
+        for value in (r.first_frame_ms, r.ttfb_ms, r.probe_ms):
+            if value is not None: return value
+        return None
+
+    def _rank_streams(self, ranked, criteria, tolerance_ms):
+        """Sort a channel's streams in place: alive, not slow, fastest startup, highest resolution, highest fps.
+
+        Latencies are grouped from the fastest up, so a stream within tolerance_ms of the fastest
+        stream in its group ties with it and is ranked by resolution and framerate instead.
+        """
+        health = {id(r): (r.status != 'Alive', self._is_slow_result(r, criteria)) for r in ranked}
+        latency = {id(r): self._stream_latency_ms(r) for r in ranked}
+        latency_group, anchor, anchor_health = {}, None, None
+        for r in sorted(ranked, key=lambda r: (health[id(r)], math.inf if latency[id(r)] is None else latency[id(r)])):
+            value = latency[id(r)]
+            if value is None:
+                latency_group[id(r)] = math.inf
+                continue
+            if health[id(r)] != anchor_health or value - anchor >= tolerance_ms:
+                anchor, anchor_health = value, health[id(r)]
+            latency_group[id(r)] = anchor
+        # Stable sort keeps the current order between equally ranked streams
+        ranked.sort(key=lambda r: health[id(r)] + (latency_group[id(r)], -FORMAT_RANK.get(r.format, 0), -(r.framerate_num or 0)))
+
+    def _aggregate_channels(self, settings, criteria=()):
+        """Group the last results by channel id, with each channel's streams ranked best first."""
+        tolerance_ms = max(1, float(settings.get("ranking_latency_tolerance_ms", 500) or 500))
+        channels = {}
+        for r in self._iter_results():
+            channels.setdefault(r.job.channel_id, []).append(r)
+        for ranked in channels.values():
+            self._rank_streams(ranked, criteria, tolerance_ms)
+        return channels
+
+    def _dead_channels(self, settings, logger):
+        """Channels whose every current stream was found dead, as {channel_id: name}.
+
+        Streams come from the loaded channels, so a channel with a stream that wasn't checked
+        (stopped or budgeted run, slice boundary) is skipped rather than judged by the rest.
+        """
+        loaded = self._load_json_file(self.loaded_channels_file, [])
+        channel_streams = {ch['id']: [s['id'] for s in ch.get('streams', [])] for ch in loaded if 'id' in ch}
+        dead, incomplete = {}, 0
+        for cid, ranked in self._aggregate_channels(settings).items():
+            stream_ids = channel_streams.get(cid)
+            if not stream_ids: continue
+            status_by_stream = {r.job.stream_id: r.status for r in ranked}
+            if any(sid not in status_by_stream for sid in stream_ids):
+                incomplete += 1
+                continue
+            if all(status_by_stream[sid] == 'Dead' for sid in stream_ids):
+                dead[cid] = ranked[0].job.channel_name
+        if incomplete:
+            logger.info(f"Skipped {incomplete} channels that still have unchecked streams")
+        return dead
+
+    def _is_slow_result(self, r, criteria):
+        """A stream is slow if it is under 30fps or matches any of the slow criteria."""
+        if 0 < r.framerate_num < 30:
+            return True
+        for key, op, threshold in criteria:
+            value = getattr(r, key)
+            if value is None and key == 'first_frame_ms' and r.first_frame_error and op in ('>', '>='):
+                # A stream that never produced a frame exceeds any startup limit
+                return True
+            if value is None: continue
+            if ((op == '>' and value > threshold) or (op == '<' and value < threshold) or
+                    (op == '>=' and value >= threshold) or (op == '<=' and value <= threshold)):
+                return True
+        return False
+
     def rename_low_framerate_channels_action(self, settings, logger):
         """Rename channels with low framerate streams."""
         prefix = settings.get("low_framerate_prefix", "")
@@ -633,9 +2334,12 @@ class Plugin:
         if not os.path.exists(self.results_file):
             return {"status": "error", "message": "No check results found. Please run 'Check Streams' first."}
             
-        with open(self.results_file, 'r') as f: results = json.load(f)
-            
-        low_fps_channels = {r['channel_id']: r['channel_name'] for r in results if 0 < r.get('framerate_num', 0) < 30}
+        criteria, error = self._parse_slow_criteria(settings)
+        if error: return {"status": "error", "message": error}
+
+        # Judge each channel by its best stream, so a slow backup stream doesn't mark a good channel
+        low_fps_channels = {cid: ranked[0].job.channel_name for cid, ranked in self._aggregate_channels(settings, criteria).items()
+                            if ranked[0].status == 'Alive' and self._is_slow_result(ranked[0], criteria)}
         if not low_fps_channels: return {"status": "success", "message": "No low framerate channels found."}
             
         payload = []
@@ -668,9 +2372,11 @@ class Plugin:
         if not os.path.exists(self.results_file):
             return {"status": "error", "message": "No check results found. Please run 'Check Streams' first."}
 
-        with open(self.results_file, 'r') as f: results = json.load(f)
-        
-        low_fps_channel_ids = {r['channel_id'] for r in results if 0 < r.get('framerate_num', 0) < 30}
+        criteria, error = self._parse_slow_criteria(settings)
+        if error: return {"status": "error", "message": error}
+
+        low_fps_channel_ids = {cid for cid, ranked in self._aggregate_channels(settings, criteria).items()
+                               if ranked[0].status == 'Alive' and self._is_slow_result(ranked[0], criteria)}
         if not low_fps_channel_ids: return {"status": "success", "message": "No low framerate channels found to move."}
         
         try:
@@ -704,12 +2410,12 @@ class Plugin:
         if not os.path.exists(self.results_file):
             return {"status": "error", "message": "No check results found. Please run 'Check Streams' first."}
 
-        with open(self.results_file, 'r') as f: results = json.load(f)
-        
-        channel_formats = {}
-        for r in results:
-            if r['status'] == 'Alive':
-                channel_formats[r['channel_id']] = r.get('format', 'Unknown')
+        criteria, error = self._parse_slow_criteria(settings)
+        if error: return {"status": "error", "message": error}
+
+        # Use the format of the stream viewers get first
+        channel_formats = {cid: ranked[0].format for cid, ranked in self._aggregate_channels(settings, criteria).items()
+                           if ranked[0].status == 'Alive'}
 
         if not channel_formats: return {"status": "success", "message": "No alive channels found to update."}
 
@@ -736,6 +2442,52 @@ class Plugin:
 
         except Exception as e: return {"status": "error", "message": str(e)}
 
+    def reorder_streams_action(self, settings, logger):
+        """Reorder each channel's streams by rank: alive streams best first, then unchecked, then dead."""
+        if not os.path.exists(self.results_file):
+            return {"status": "error", "message": "No check results found. Please run 'Check Streams' first."}
+
+        criteria, error = self._parse_slow_criteria(settings)
+        if error: return {"status": "error", "message": error}
+
+        channels = self._aggregate_channels(settings, criteria)
+        if not channels: return {"status": "success", "message": "No checked channels found to reorder."}
+
+        try:
+            token, error = self._get_api_token(settings, logger)
+            if error: return {"status": "error", "message": error}
+
+            all_channels = self._get_api_data("/api/channels/channels/", token, settings)
+            updated, failed = 0, 0
+            for channel in all_channels:
+                ranked = channels.get(channel.get('id'))
+                if not ranked: continue
+                streams = channel.get('streams')
+                if streams is None:
+                    streams = self._get_api_data(f"/api/channels/channels/{channel['id']}/streams/", token, settings)
+                current = [s['id'] if isinstance(s, dict) else s for s in streams]
+                checked = {r.job.stream_id for r in ranked}
+                alive = [r.job.stream_id for r in ranked if r.status == 'Alive' and r.job.stream_id in current]
+                dead = [r.job.stream_id for r in ranked if r.status != 'Alive' and r.job.stream_id in current]
+                new_order = alive + [sid for sid in current if sid not in checked] + dead
+                if new_order == current: continue
+                try:
+                    self._patch_api_data(f"/api/channels/channels/{channel['id']}/", token, {'streams': new_order}, settings)
+                    updated += 1
+                    logger.info(f"Reordered streams for channel '{channel.get('name')}': {current} -> {new_order}")
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Failed to reorder streams for channel '{channel.get('name')}': {e}")
+
+            if not updated and not failed:
+                return {"status": "success", "message": "All channels already have their best stream first."}
+            self._trigger_m3u_refresh(token, settings, logger)
+            message = f"Successfully reordered streams for {updated} channels. GUI refresh triggered."
+            if failed: message += f" {failed} channels could not be updated; see the logs."
+            return {"status": "success", "message": message}
+
+        except Exception as e: return {"status": "error", "message": str(e)}
+
     def remove_tags_action(self, settings, logger):
         """Removes all text within square brackets from channel names."""
         if not os.path.exists(self.loaded_channels_file):
@@ -768,55 +2520,174 @@ class Plugin:
 
         except Exception as e: return {"status": "error", "message": str(e)}
 
+    def _write_results(self, results):
+        """Write ProbeResults as a JSON array with one row per line, replacing the file atomically."""
+        tmp_file = f"{self.results_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write('[\n')
+            for i, row in enumerate(results):
+                if i: f.write(',\n')
+                f.write(row.to_json())
+            f.write('\n]\n')
+        os.replace(tmp_file, self.results_file)
+
+    def _iter_results(self, chunk_size=65536):
+        """Yield ProbeResults one at a time without loading the whole results file."""
+        decoder = json.JSONDecoder()
+        with open(self.results_file, 'r', encoding='utf-8') as f:
+            buffer, started = '', False
+            while True:
+                chunk = f.read(chunk_size)
+                buffer += chunk
+                pos = 0
+                while True:
+                    while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                        pos += 1
+                    if pos >= len(buffer):
+                        break
+                    if not started:
+                        if buffer[pos] != '[':
+                            raise ValueError("Results file is not a JSON array.")
+                        started, pos = True, pos + 1
+                        continue
+                    if buffer[pos] == ']':
+                        return
+                    try:
+                        row, pos = decoder.raw_decode(buffer, pos)
+                    except ValueError:
+                        break  # Row continues in the next chunk
+                    yield ProbeResult.from_row(row)
+                buffer = buffer[pos:]
+                if not chunk:
+                    if buffer.strip():
+                        raise ValueError("Results file is truncated.")
+                    return
+
+    def _parse_filter_values(self, value):
+        """Split a comma-separated filter setting into a lowercase set."""
+        return {v.strip().lower() for v in str(value or '').split(',') if v.strip()}
+
+    def _build_results_filter(self, settings):
+        """Build a row predicate from the results table filter settings."""
+        statuses = self._parse_filter_values(settings.get("table_status_filter", ""))
+        error_types = self._parse_filter_values(settings.get("table_error_type_filter", ""))
+        formats = self._parse_filter_values(settings.get("table_format_filter", ""))
+        groups = self._parse_filter_values(settings.get("table_group_filter", ""))
+        fps_min = float(settings.get("table_fps_min", 0) or 0)
+        fps_max = float(settings.get("table_fps_max", 0) or 0)
+
+        def matches(r):
+            if statuses and r.status.lower() not in statuses: return False
+            if error_types and r.error_type.lower() not in error_types: return False
+            if formats and r.format.lower() not in formats: return False
+            if groups and r.job.group_name.lower() not in groups: return False
+            fps = r.framerate_num or 0
+            if fps_min > 0 and fps < fps_min: return False
+            if fps_max > 0 and fps > fps_max: return False
+            return True
+        return matches
+
     def view_table_action(self, settings, logger):
-        """Display results in table format"""
+        """Display a filtered page of results in table format"""
         if not os.path.exists(self.results_file): return {"status": "error", "message": "No results available."}
-        with open(self.results_file, 'r') as f: results = json.load(f)
-        lines = ["="*120, f"{'Channel Name':<35} {'Status':<8} {'Format':<8} {'FPS':<8} {'Error Type':<20} {'Error Details':<35}", "="*120]
-        for r in results:
-            fps = r.get('framerate_num', 0)
+
+        page_size = max(1, int(settings.get("table_page_size", 100) or 100))
+        page = max(1, int(settings.get("table_page", 1) or 1))
+        first_row = (page - 1) * page_size
+        matches = self._build_results_filter(settings)
+
+        # Only the requested page is kept in memory; the rest are just counted
+        page_rows, matched = [], 0
+        for r in self._iter_results():
+            if not matches(r): continue
+            if first_row <= matched < first_row + page_size:
+                page_rows.append(r)
+            matched += 1
+
+        total_pages = max(1, (matched + page_size - 1) // page_size)
+        if not page_rows:
+            return {"status": "success", "message": f"No rows to show on page {page} ({matched} matching rows, {total_pages} pages)."}
+
+        lines = [f"Rows {first_row + 1}-{first_row + len(page_rows)} of {matched} matching (page {page}/{total_pages})",
+                 "="*141, f"{'Channel Name':<35} {'Group':<20} {'Status':<8} {'Format':<8} {'FPS':<8} {'Error Type':<20} {'Error Details':<35}", "="*141]
+        for r in page_rows:
+            fps = r.framerate_num
             fps_str = f"{fps:.1f}" if fps > 0 else "N/A"
-            error_type = r.get('error_type', 'N/A')
-            error_details = r.get('error', '')[:34] if r.get('error') else ''
-            lines.append(f"{r.get('channel_name', 'N/A')[:34]:<35} {r.get('status', 'N/A'):<8} {r.get('format', 'N/A'):<8} {fps_str:<8} {error_type:<20} {error_details:<35}")
-        lines.append("="*120)
+            error_details = r.error[:34] if r.error else ''
+            lines.append(f"{(r.job.channel_name or 'N/A')[:34]:<35} {(r.job.group_name or 'N/A')[:19]:<20} {r.status:<8} {r.format:<8} {fps_str:<8} {r.error_type:<20} {error_details:<35}")
+        lines.append("="*141)
         return {"status": "success", "message": "\n".join(lines)}
 
     def get_results_action(self, settings, logger):
         """Display summary of last check or live progress."""
-        if self.check_progress['status'] == 'running':
-            current, total = self.check_progress['current'], self.check_progress['total']
-            percent = (current / total * 100) if total > 0 else 0
-            return {"status": "success", "message": f"Checking streams {current}/{total} - {percent:.0f}% complete"}
+        state = self.run_state.read()
+        if self.run_state.is_active(state):
+            return {"status": "success", "message": self._format_progress(state)}
 
         if not os.path.exists(self.results_file): return {"status": "error", "message": "No results available."}
-        with open(self.results_file, 'r') as f: results = json.load(f)
-        alive = sum(1 for r in results if r.get('status') == 'Alive')
-        formats = {r.get('format', 'Unknown'): 0 for r in results if r.get('status') == 'Alive'}
-        for r in results:
-            if r.get('status') == 'Alive': formats[r.get('format', 'Unknown')] += 1
-        summary = [f"Check Summary ({len(results)} streams):", f"• Alive: {alive}", f"• Dead: {len(results) - alive}\n", "Alive Stream Formats:"]
+        total, alive, formats = 0, 0, {}
+        for r in self._iter_results():
+            total += 1
+            if r.status == 'Alive':
+                alive += 1
+                formats[r.format] = formats.get(r.format, 0) + 1
+        summary = [f"Check Summary ({total} streams):", f"• Alive: {alive}", f"• Dead: {total - alive}\n", "Alive Stream Formats:"]
         for fmt, count in sorted(formats.items()):
             if count > 0: summary.append(f"• {fmt}: {count}")
         return {"status": "success", "message": "\n".join(summary)}
 
+    def _export_filepath(self, basename, extension):
+        """Build a timestamped export path under /data/exports."""
+        os.makedirs("/data/exports", exist_ok=True)
+        return f"/data/exports/{basename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
     def export_results_action(self, settings, logger):
         """Export results to CSV"""
         if not os.path.exists(self.results_file): return {"status": "error", "message": "No results to export."}
-        with open(self.results_file, 'r') as f: results = json.load(f)
-        
-        # Round framerate to 1 decimal place for cleaner CSV
-        for result in results:
-            if 'framerate_num' in result and result['framerate_num'] > 0:
-                result['framerate_num'] = round(result['framerate_num'], 1)
         
-        filepath = f"/data/exports/iptv_check_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        os.makedirs("/data/exports", exist_ok=True)
+        filepath = self._export_filepath("iptv_check_results", "csv")
+        count = 0
         with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=['channel_name', 'stream_url', 'status', 'format', 'framerate_num', 'error_type', 'error'], extrasaction='ignore')
+            writer = csv.DictWriter(f, fieldnames=['channel_name', 'group_name', 'stream_url', 'status', 'format', 'framerate_num', 'error_type', 'error',
+                                                   'probe_ms', 'connect_ms', 'ttfb_ms', 'first_frame_ms', 'first_frame_error', 'bitrate_kbps', 'declared_bitrate_kbps', 'bitrate_ratio', 'throughput_kbps', 'throughput_ratio', 'checked_at'], extrasaction='ignore')
             writer.writeheader()
-            writer.writerows(results)
-        return {"status": "success", "message": f"Results exported to {filepath}"}
+            for result in self._iter_results():
+                row = result.to_row()
+                # Round framerate to 1 decimal place for cleaner CSV
+                if row['framerate_num'] > 0:
+                    row['framerate_num'] = round(row['framerate_num'], 1)
+                writer.writerow(row)
+                count += 1
+        return {"status": "success", "message": f"{count} results exported to {filepath}"}
+
+    def export_results_jsonl_action(self, settings, logger):
+        """Export results to gzip-compressed JSON Lines"""
+        if not os.path.exists(self.results_file): return {"status": "error", "message": "No results to export."}
+
+        filepath = self._export_filepath("iptv_check_results", "jsonl.gz")
+        count = 0
+        with gzip.open(filepath, 'wt', encoding='utf-8') as f:
+            for result in self._iter_results():
+                f.write(result.to_json() + '\n')
+                count += 1
+        return {"status": "success", "message": f"{count} results exported to {filepath}"}
+
+    def export_alive_m3u_action(self, settings, logger):
+        """Export alive streams to an M3U playlist"""
+        if not os.path.exists(self.results_file): return {"status": "error", "message": "No results to export."}
+
+        filepath = self._export_filepath("iptv_alive_streams", "m3u")
+        count = 0
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write("#EXTM3U\n")
+            for result in self._iter_results():
+                job = result.job
+                if result.status != 'Alive' or not job.stream_url: continue
+                name = str(job.channel_name or '').replace('"', "'").replace('\n', ' ')
+                group = job.group_name.replace('"', "'").replace('\n', ' ')
+                f.write(f'#EXTINF:-1 tvg-name="{name}" group-title="{group}",{name}\n{job.stream_url}\n')
+                count += 1
+        return {"status": "success", "message": f"{count} alive streams exported to {filepath}"}
 
     def _perform_bulk_patch(self, token, settings, logger, payload):
         """Send a bulk PATCH request to the Dispatcharr API."""
@@ -825,8 +2696,9 @@ class Plugin:
         url = f"{dispatcharr_url}/api/channels/channels/edit/bulk/"
         headers = {'Authorization': f"Bearer {token}", 'Content-Type': 'application/json'}
         logger.info(f"Sending bulk patch for {len(payload)} channels.")
-        response = requests.patch(url, headers=headers, json=payload, timeout=60)
-        response.raise_for_status()
+        with METRICS.time_api("PATCH", "/api/channels/channels/edit/bulk/"):
+            response = requests.patch(url, headers=headers, json=payload, timeout=60)
+            response.raise_for_status()
         logger.info(f"Successfully patched {len(payload)} channels.")
         return len(payload)
 
@@ -851,86 +2723,179 @@ class Plugin:
             return float(framerate_str)
         except (ValueError, ZeroDivisionError): return 0
 
-    def check_stream(self, stream_data, timeout, retries, logger, skip_retries=False):
-        """Check individual stream status with optional retries."""
-        url, channel_name = stream_data.get('stream_url'), stream_data.get('channel_name')
+    def _run_probe(self, cmd, timeout):
+        """Run a probe in its own process group so it can be terminated as a whole.
+
+        Returns None if the probe was killed by a stop or pause request.
+        """
+        if self.probe_governor:
+            cmd = self.probe_governor.wrap_command(cmd)
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, start_new_session=True)
+        CHECK_CONTROL.register(process)
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            CheckControl.signal_group(process, signal.SIGKILL)
+            process.communicate()
+            raise
+        finally:
+            CHECK_CONTROL.unregister(process)
+        if process.returncode != 0 and (CHECK_CONTROL.stopped or CHECK_CONTROL.paused):
+            return None
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+    def _measure_http_timing(self, url, timeout, max_redirects=5):
+        """Measure TCP connect time and time to first byte for an HTTP(S) stream URL.
+
+        Returns (connect_ms, ttfb_ms); either may be None if the URL is not HTTP or the request fails.
+        """
+        connect_ms = None
+        start = time.monotonic()
+        for _ in range(max_redirects + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https') or not parts.hostname:
+                return connect_ms, None
+            conn_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+            conn = conn_class(parts.hostname, parts.port, timeout=timeout)
+            try:
+                connect_start = time.monotonic()
+                conn.connect()
+                if connect_ms is None:
+                    connect_ms = round((time.monotonic() - connect_start) * 1000)
+                path = parts.path or '/'
+                if parts.query: path += f"?{parts.query}"
+                conn.request('GET', path, headers={'User-Agent': USER_AGENT})
+                response = conn.getresponse()
+                if response.status in (301, 302, 303, 307, 308) and response.getheader('Location'):
+                    url = urljoin(url, response.getheader('Location'))
+                    continue
+                if response.status >= 400:
+                    return connect_ms, None
+                response.read(1)
+                return connect_ms, round((time.monotonic() - start) * 1000)
+            except (OSError, http.client.HTTPException):
+                return connect_ms, None
+            finally:
+                conn.close()
+        return connect_ms, None
+
+    def _measure_stream_performance(self, job, timeout, sample_seconds, logger):
+        """Measure startup latency and sustained bitrate of an alive stream."""
+        url, channel_name = job.stream_url, job.channel_name
+        metrics = {}
+
+        connect_ms, ttfb_ms = self._measure_http_timing(url, timeout)
+        if connect_ms is not None: metrics['connect_ms'] = connect_ms
+        if ttfb_ms is not None: metrics['ttfb_ms'] = ttfb_ms
+
+        # Time until the first video frame has been decoded, as experienced by a player starting the stream.
+        # ffmpeg keeps reading until it has a frame, so joining a live stream mid-GOP just takes longer.
+        limit = timeout * 2 + 2
+        try:
+            cmd = [FFMPEG_PATH, '-v', 'error', '-nostdin', '-nostats', '-progress', 'pipe:1', '-user_agent', USER_AGENT, '-rw_timeout', str(timeout * 1000000), '-i', url,
+                   '-map', '0:v:0', '-frames:v', '1', '-f', 'null', '-']
+            start = time.monotonic()
+            result = self._run_probe(cmd, limit)
+            if result is not None:
+                frames = [line.split('=', 1)[1].strip() for line in result.stdout.splitlines() if line.startswith('frame=')]
+                if result.returncode == 0 and frames and frames[-1].isdigit() and int(frames[-1]) > 0:
+                    metrics['first_frame_ms'] = round((time.monotonic() - start) * 1000)
+                elif result.returncode != 0 and result.stderr.strip():
+                    metrics['first_frame_error'] = result.stderr.strip().splitlines()[-1][:200]
+                else:
+                    metrics['first_frame_error'] = 'No video frame decoded'
+        except subprocess.TimeoutExpired:
+            metrics['first_frame_error'] = f"No video frame decoded within {limit}s"
+        except (OSError, ValueError) as e:
+            logger.warning(f"Channel '{channel_name}': first frame measurement failed: {e}")
+        if 'first_frame_error' in metrics:
+            logger.info(f"Channel '{channel_name}': {metrics['first_frame_error']}")
+
+        # Sustained bitrate: copy the stream for the sample window and compare media time to wall time
+        try:
+            cmd = [FFMPEG_PATH, '-v', 'error', '-nostdin', '-nostats', '-progress', 'pipe:1', '-user_agent', USER_AGENT, '-rw_timeout', str(timeout * 1000000), '-i', url,
+                   '-t', str(sample_seconds), '-map', '0:v?', '-map', '0:a?', '-c', 'copy', '-f', 'mpegts', '-y', os.devnull]
+            start = time.monotonic()
+            result = self._run_probe(cmd, sample_seconds + timeout * 2 + 5)
+            elapsed = time.monotonic() - start
+            if result is not None and result.returncode == 0:
+                # The last progress block holds the final totals; values are 'N/A' when unknown
+                progress = dict(line.strip().split('=', 1) for line in result.stdout.splitlines() if '=' in line)
+                total_bytes = int(progress['total_size']) if progress.get('total_size', '').isdigit() else 0
+                media_seconds = int(progress['out_time_us']) / 1000000 if progress.get('out_time_us', '').isdigit() else 0
+                if total_bytes > 0 and media_seconds > 0:
+                    metrics['bitrate_kbps'] = round(total_bytes * 8 / media_seconds / 1000)
+                    metrics['throughput_kbps'] = round(total_bytes * 8 / elapsed / 1000)
+                    metrics['throughput_ratio'] = round(media_seconds / elapsed, 2)
+        except subprocess.TimeoutExpired:
+            logger.info(f"Channel '{channel_name}': bitrate sample did not finish in time")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Channel '{channel_name}': bitrate measurement failed: {e}")
+
+        return metrics
+
+    def check_stream(self, job, timeout, retries, logger, skip_retries=False):
+        """Check individual stream status with optional retries and return a ProbeResult."""
+        url, channel_name = job.stream_url, job.channel_name
         last_error = "Unknown error"
         last_error_type = "Other"
-        default_return = {'status': 'Dead', 'error': '', 'error_type': 'Other', 'format': 'N/A', 'framerate_num': 0}
+        last_transient = False
+        last_diagnostics = ''
+        last_returncode = None
 
         # Determine how many attempts to make
         max_attempts = 1 if skip_retries else (retries + 1)
 
         for attempt in range(max_attempts):
             try:
-                cmd = ['/usr/local/bin/ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_streams', '-user_agent', 'IPTVChecker 1.0', '-timeout', str(timeout * 1000000), url]
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout + 2)
+                # '-v error' keeps stdout as clean JSON while ffprobe's error diagnostics go to stderr for classification
+                cmd = [FFPROBE_PATH, '-v', 'error', '-print_format', 'json', '-show_streams', '-show_format', '-user_agent', USER_AGENT, '-timeout', str(timeout * 1000000), url]
+                started = time.monotonic()
+                result = self._run_probe(cmd, timeout + 2)
+                if result is None:
+                    return ProbeResult.probed(job, error='Check interrupted', error_type='Cancelled')
                 
+                last_returncode = result.returncode
                 if result.returncode == 0:
                     probe_data = json.loads(result.stdout)
                     video_stream = next((s for s in probe_data.get('streams', []) if s['codec_type'] == 'video'), None)
                     if video_stream:
                         resolution = f"{video_stream.get('width', 0)}x{video_stream.get('height', 0)}"
                         framerate_num = self.parse_framerate(video_stream.get('r_frame_rate', '0/1'))
-                        return {'status': 'Alive', 'error': '', 'error_type': 'N/A', 'format': self._get_stream_format(resolution), 'framerate_num': framerate_num}
+                        alive_return = ProbeResult.probed(job, status='Alive', error_type='N/A', format=self._get_stream_format(resolution), framerate_num=framerate_num,
+                                                          probe_ms=round((time.monotonic() - started) * 1000))
+                        declared_bitrate = probe_data.get('format', {}).get('bit_rate') or video_stream.get('bit_rate')
+                        if declared_bitrate and str(declared_bitrate).isdigit():
+                            alive_return.declared_bitrate_kbps = round(int(declared_bitrate) / 1000)
+                        return alive_return
                     else: 
                         last_error = 'No video stream found'
                         last_error_type = 'No Video Stream'
+                        last_transient = False
                 else: 
-                    error_output = result.stderr.strip() or 'Stream not accessible'
-                    last_error = error_output
-                    
-                    # Categorize the error type based on common ffprobe error patterns
-                    error_lower = error_output.lower()
-                    if 'timed out' in error_lower or 'timeout' in error_lower or 'connection timeout' in error_lower:
-                        last_error_type = 'Timeout'
-                        last_error = 'Connection timeout'
-                    elif '404' in error_output or 'not found' in error_lower or 'no such file' in error_lower:
-                        last_error_type = '404 Not Found'
-                        last_error = '404 Not Found'
-                    elif '403' in error_output or 'forbidden' in error_lower:
-                        last_error_type = '403 Forbidden' 
-                        last_error = '403 Forbidden'
-                    elif '500' in error_output or 'internal server error' in error_lower:
-                        last_error_type = 'Server Error'
-                        last_error = '500 Server Error'
-                    elif 'connection refused' in error_lower:
-                        last_error_type = 'Connection Refused'
-                        last_error = 'Connection refused'
-                    elif 'network unreachable' in error_lower or 'no route to host' in error_lower:
-                        last_error_type = 'Network Unreachable'
-                        last_error = 'Network unreachable'
-                    elif 'invalid data found' in error_lower or 'invalid argument' in error_lower:
-                        last_error_type = 'Invalid Stream'
-                        last_error = 'Invalid stream format'
-                    elif 'protocol not supported' in error_lower:
-                        last_error_type = 'Unsupported Protocol'
-                        last_error = 'Unsupported protocol'
-                    elif result.returncode == 1:
-                        # Common ffprobe return code for unreachable streams
-                        last_error_type = 'Stream Unreachable'
-                        last_error = 'Stream unreachable'
-                    else:
-                        last_error_type = 'Other'
-                        # Keep original error but make it cleaner
-                        if 'stream not accessible' in error_lower:
-                            last_error = 'Stream not accessible'
+                    last_diagnostics = result.stderr.strip()
+                    last_error_type, last_error, last_transient = classify_probe_failure(last_diagnostics, result.returncode)
                         
             except subprocess.TimeoutExpired: 
                 last_error = 'Connection timeout'
                 last_error_type = 'Timeout'
+                last_transient = True
             except Exception as e: 
                 last_error = str(e)
                 last_error_type = 'Other'
+                last_transient = False
 
-            # Only do immediate retries if not skipping them and not the last attempt
-            if not skip_retries and attempt < max_attempts - 1:
-                logger.info(f"Channel '{channel_name}' stream check failed. Retrying ({attempt+1}/{retries})...")
+            # Only do immediate retries for transient failures, if not skipping them and not the last attempt
+            if not skip_retries and last_transient and attempt < max_attempts - 1:
+                logger.info(f"Channel '{channel_name}' stream check failed ({last_error_type}). Retrying ({attempt+1}/{retries})...")
                 time.sleep(1)
+            else:
+                break
         
-        default_return['error'] = last_error
-        default_return['error_type'] = last_error_type
-        return default_return
+        # Keep the last diagnostic line for troubleshooting without storing full ffprobe output
+        diagnostics = last_diagnostics.splitlines()[-1][:200] if last_diagnostics else None
+        return ProbeResult.probed(job, error=last_error, error_type=last_error_type, transient=last_transient,
+                                  probe_returncode=last_returncode, diagnostics=diagnostics)
 
 # Export for Dispatcharr plugin system - Multiple export formats for compatibility
 plugin = Plugin()